@@ -0,0 +1,70 @@
+# app/cache.py
+
+"""
+In-process TTL cache for hot, read-mostly lookups.
+
+Cache-aside: read with get_cached(), fall through to the database on a
+MISS, then set_cached() the result. Writers invalidate() the keys they
+change. Entries live in this worker's memory only.
+"""
+
+import time
+from typing import Any
+
+# Returned by get_cached() when a key is absent or expired, so that a
+# cached None (e.g. "not connected") is distinguishable from a miss.
+MISS = object()
+
+# Upper bound on stored entries; oldest entries are evicted first
+MAX_ENTRIES = 10_000
+
+# A full store is trimmed to this share of MAX_ENTRIES in one pass, so
+# the O(n) sweep runs once per batch of writes instead of on every write
+EVICT_TO = 0.9
+
+_store: dict[str, tuple[float, Any]] = {}
+
+
+def get_cached(key: str) -> Any:
+    """Return the cached value for key, or MISS."""
+    entry = _store.get(key)
+    if entry is None:
+        return MISS
+
+    expires_at, value = entry
+    if expires_at <= time.monotonic():
+        _store.pop(key, None)
+        return MISS
+    return value
+
+
+def set_cached(key: str, value: Any, ttl: float) -> None:
+    """Cache value under key for ttl seconds."""
+    _store.pop(key, None)
+    if len(_store) >= MAX_ENTRIES:
+        _evict()
+    _store[key] = (time.monotonic() + ttl, value)
+
+
+def invalidate(*keys: str) -> None:
+    """Drop the given keys, if cached."""
+    for key in keys:
+        _store.pop(key, None)
+
+
+def invalidate_prefix(prefix: str) -> None:
+    """Drop every key starting with prefix."""
+    for key in [k for k in _store if k.startswith(prefix)]:
+        del _store[key]
+
+
+def _evict() -> None:
+    """Drop expired entries, then the oldest ones down to EVICT_TO of capacity."""
+    now = time.monotonic()
+    for key in [k for k, (expires_at, _) in _store.items() if expires_at <= now]:
+        del _store[key]
+
+    # Dicts keep insertion order, so the first keys are the oldest writes
+    target = int(MAX_ENTRIES * EVICT_TO)
+    while len(_store) > target:
+        del _store[next(iter(_store))]
@@ -44,10 +44,13 @@ async def enhance_matches_with_ai(
 async def get_ai_suggestion(
     match: MatchDB,
     user_id: str,
-) -> dict:
+) -> Optional[dict]:
     """
     Get AI suggestion for a specific match.
     
+    Returns None if Claude can't be reached, so callers can tell a real
+    suggestion from claude.default_suggestion().
+    
     Returns:
         {
             "action": "mark_as_expected" | etc,
@@ -56,13 +59,13 @@ async def get_ai_suggestion(
         }
     """
     user_history = await get_user_resolutions(user_id, limit=50)
-    return await claude.suggest_resolution(match, user_history)
+    return await claude.suggest_resolution(match, user_history, fallback=False)
 
 
-async def explain_match(match: MatchDB) -> str:
-    """Get AI explanation for a specific match."""
+async def explain_match(match: MatchDB) -> Optional[str]:
+    """Get AI explanation for a specific match, or None if Claude can't be reached."""
     if match.has_discrepancy:
-        return await claude.explain_discrepancy(match)
+        return await claude.explain_discrepancy(match, fallback=False)
     return "This transaction matched successfully with high confidence."
 
 
@@ -8,7 +8,7 @@ Classifies the type and severity of discrepancies between matched transactions.
 
 from datetime import date
 from app.models import (
-    TransactionCreate,
+    TxnCore,
     DiscrepancyClassification,
     DiscrepancyType,
     DiscrepancySeverity,
@@ -17,10 +17,17 @@ from app.config import get_settings
 
 settings = get_settings()
 
+# Stripe's standard pricing, resolved once from settings
+STRIPE_FEE_RATE = settings.stripe_fee_percent / 100
+STRIPE_FEE_FIXED = settings.stripe_fee_fixed
+
+# A net amount within this fraction of the gross counts as a fee pattern
+FEE_MATCH_TOLERANCE = 0.005
+
 
 def classify_discrepancy(
-    stripe: TransactionCreate,
-    qbo: TransactionCreate | None,
+    stripe: TxnCore,
+    qbo: TxnCore | None,
 ) -> DiscrepancyClassification:
     """
     Classify the discrepancy between a Stripe transaction and its QuickBooks match.
@@ -49,9 +56,8 @@ def classify_discrepancy(
     # ============================================
     # Check for Stripe fee pattern
     # ============================================
-    expected_fee = _calculate_stripe_fee(stripe.amount)
-    fee_variance = abs(amount_diff - expected_fee)
-    is_fee_pattern = fee_variance < (stripe.amount * 0.005)  # Within 0.5%
+    fee_variance = abs(expected_net_amount(stripe.amount) - qbo.amount)
+    is_fee_pattern = fee_variance < (stripe.amount * FEE_MATCH_TOLERANCE)
     
     if is_fee_pattern and amount_diff > 0:
         return DiscrepancyClassification(
@@ -131,7 +137,7 @@ def classify_discrepancy(
 
 
 def classify_unmatched(
-    transaction: TransactionCreate,
+    transaction: TxnCore,
     source: str,
 ) -> DiscrepancyClassification:
     """Classify an unmatched transaction."""
@@ -172,13 +178,13 @@ def classify_unmatched(
         )
 
 
-def _calculate_stripe_fee(amount: float) -> float:
-    """Calculate expected Stripe fee for an amount."""
-    return (amount * settings.stripe_fee_percent / 100) + settings.stripe_fee_fixed
+def expected_net_amount(amount: float) -> float:
+    """Amount left after Stripe's standard fee on a gross amount."""
+    return amount * (1 - STRIPE_FEE_RATE) - STRIPE_FEE_FIXED
 
 
 def determine_priority(
-    transaction: TransactionCreate,
+    transaction: TxnCore,
     days_old: int,
 ) -> str:
     """Determine priority for an unmatched transaction."""
@@ -11,8 +11,10 @@ Scoring breakdown (0-100):
 """
 
 from datetime import date
+from functools import lru_cache
+from typing import Optional
 import re
-from app.models import ConfidenceBreakdown, ConfidenceLevel, TransactionCreate
+from app.models import ConfidenceBreakdown, ConfidenceLevel, TxnCore
 from app.config import get_settings
 
 settings = get_settings()
@@ -21,10 +23,20 @@ settings = get_settings()
 HIGH_CONFIDENCE = settings.auto_match_threshold  # 85
 MEDIUM_CONFIDENCE = 60
 
+# Most a pair can score from date + customer + description
+MAX_NON_AMOUNT_SCORE = 30 + 20 + 10
+
+# Customer names and descriptions repeat across a run, so normalized
+# strings and pair similarities are cached per process
+STRING_CACHE_SIZE = 65536
+
+# (max percent difference, points) bands of _score_amount(), widest first
+AMOUNT_BANDS = ((10, 8), (5, 15), (3, 20), (1, 30), (0.01, 38))
+
 
 def calculate_confidence(
-    stripe: TransactionCreate,
-    qbo: TransactionCreate,
+    stripe: TxnCore,
+    qbo: TxnCore,
     date_tolerance_days: int = None,
 ) -> ConfidenceBreakdown:
     """
@@ -65,7 +77,9 @@ def calculate_confidence(
     total = amount_score + date_score + customer_score + description_score
     level = _get_confidence_level(total)
     
-    return ConfidenceBreakdown(
+    # Every score comes from a fixed band above, so skip field validation;
+    # this runs once per candidate pair
+    return ConfidenceBreakdown.model_construct(
         amount_score=amount_score,
         date_score=date_score,
         customer_score=customer_score,
@@ -76,6 +90,23 @@ def calculate_confidence(
     )
 
 
+def amount_tolerance_for(min_score: int) -> Optional[float]:
+    """
+    Widest percent amount difference at which a pair can still reach min_score.
+
+    Returns None when the other factors alone can reach it, i.e. any
+    amount qualifies. Exact matches (under a cent apart) always qualify.
+    """
+    needed = min_score - MAX_NON_AMOUNT_SCORE
+    if needed <= 0:
+        return None
+
+    for percent, points in AMOUNT_BANDS:
+        if points >= needed:
+            return percent
+    return 0.0
+
+
 def _score_amount(stripe_amount: float, qbo_amount: float, factors: list[str]) -> int:
     """Score based on amount match (0-40 points)."""
     # Use absolute values to handle negative amounts (refunds)
@@ -213,6 +244,7 @@ def _get_confidence_level(score: int) -> ConfidenceLevel:
         return "low"
 
 
+@lru_cache(maxsize=STRING_CACHE_SIZE)
 def _normalize_string(s: str) -> str:
     """Normalize string for comparison."""
     # Lowercase, remove special chars, collapse whitespace
@@ -230,6 +262,15 @@ def _fuzzy_similarity(s1: str, s2: str) -> float:
     Using simple character overlap for speed.
     Could upgrade to Levenshtein distance later.
     """
+    # Symmetric, so (a, b) and (b, a) share one cache entry
+    if s2 < s1:
+        s1, s2 = s2, s1
+    return _pair_similarity(s1, s2)
+
+
+@lru_cache(maxsize=STRING_CACHE_SIZE)
+def _pair_similarity(s1: str, s2: str) -> float:
+    """Similarity of an ordered pair; call _fuzzy_similarity() instead."""
     if not s1 or not s2:
         return 0.0
     
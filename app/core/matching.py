@@ -7,12 +7,14 @@ This is the MOAT - the deterministic matching algorithm that pairs
 Stripe transactions with QuickBooks entries.
 """
 
+from bisect import bisect_left, bisect_right
 from datetime import date, datetime
+import heapq
 from typing import Optional
 import uuid
 
 from app.models import (
-    TransactionCreate,
+    TxnCore,
     ConfidenceBreakdown,
     DiscrepancyClassification,
     MatchDB,
@@ -20,16 +22,36 @@ from app.models import (
     PossibleMatch,
     ReconciliationSummary,
 )
-from app.core.confidence import calculate_confidence
+from app.core.confidence import HIGH_CONFIDENCE, amount_tolerance_for, calculate_confidence
 from app.core.classification import (
+    FEE_MATCH_TOLERANCE,
     classify_discrepancy,
     classify_unmatched,
     determine_priority,
+    expected_net_amount,
 )
 from app.config import get_settings
 
 settings = get_settings()
 
+# Lowest confidence total worth listing as a possible match
+POSSIBLE_MATCH_MIN_SCORE = 30
+
+# Possible matches listed per unmatched transaction
+MAX_POSSIBLE_MATCHES = 3
+
+# Best phase-2 candidates kept per Stripe transaction for the unmatched
+# pass, with a few spare in case some are matched in the meantime
+KEPT_CANDIDATES = 8
+
+# Widest amount difference (percent) that can still score a high-confidence
+# match; phase 1 only scores candidates inside it
+HIGH_MATCH_TOLERANCE = amount_tolerance_for(HIGH_CONFIDENCE)
+
+# Absolute slack added to amount windows: covers the exact-match band
+# (under a cent apart) and float rounding at the window edges
+AMOUNT_WINDOW_SLACK = 0.01
+
 
 class ReconciliationResult:
     """Result of a reconciliation run."""
@@ -84,8 +106,8 @@ class ReconciliationResult:
 
 
 def reconcile(
-    stripe_transactions: list[TransactionCreate],
-    qbo_transactions: list[TransactionCreate],
+    stripe_transactions: list[TxnCore],
+    qbo_transactions: list[TxnCore],
     user_id: str,
 ) -> ReconciliationResult:
     """
@@ -104,6 +126,10 @@ def reconcile(
     matched_stripe_ids: set[str] = set()
     matched_qbo_ids: set[str] = set()
 
+    # Best-scoring candidates from phase 2, per Stripe id. The unmatched
+    # pass picks from these instead of rescoring every pair.
+    scored_candidates: dict[str, list[tuple[TxnCore, ConfidenceBreakdown]]] = {}
+
     # ============================================
     # Separate transactions by type
     # ============================================
@@ -125,13 +151,14 @@ def reconcile(
     # ============================================
     sorted_charges = sorted(stripe_charges, key=lambda t: t.amount, reverse=True)
     sorted_payments = sorted(qbo_payments, key=lambda t: t.amount, reverse=True)
+    payments_index = _amount_index(sorted_payments)
 
     # Phase 1: High-confidence matches (auto-match)
     for stripe in sorted_charges:
         if stripe.external_id in matched_stripe_ids:
             continue
 
-        for qbo in sorted_payments:
+        for qbo in _high_match_candidates(stripe, sorted_payments, payments_index):
             if qbo.external_id in matched_qbo_ids:
                 continue
 
@@ -153,14 +180,15 @@ def reconcile(
         if stripe.external_id in matched_stripe_ids:
             continue
 
-        best_match: Optional[tuple[TransactionCreate, ConfidenceBreakdown]] = None
+        best_match: Optional[tuple[TxnCore, ConfidenceBreakdown]] = None
 
-        for qbo in sorted_payments:
+        scored = _score_candidates(stripe, sorted_payments, matched_qbo_ids)
+        scored_candidates[stripe.external_id] = _best_scored(scored)
+
+        for qbo, confidence in scored:
             if qbo.external_id in matched_qbo_ids:
                 continue
 
-            confidence = calculate_confidence(stripe, qbo)
-
             if confidence.level == "medium":
                 if best_match is None or confidence.total > best_match[1].total:
                     best_match = (qbo, confidence)
@@ -181,7 +209,7 @@ def reconcile(
         if stripe.external_id in matched_stripe_ids:
             continue
 
-        fee_match = _find_fee_adjusted_match(stripe, sorted_payments, matched_qbo_ids)
+        fee_match = _find_fee_adjusted_match(stripe, sorted_payments, payments_index, matched_qbo_ids)
 
         if fee_match:
             qbo, confidence = fee_match
@@ -199,13 +227,14 @@ def reconcile(
     # ============================================
     sorted_refunds = sorted(stripe_refunds, key=lambda t: abs(t.amount), reverse=True)
     sorted_credits = sorted(qbo_credits, key=lambda t: abs(t.amount), reverse=True)
+    credits_index = _amount_index(sorted_credits)
 
     # Phase 1: High-confidence refund matches
     for stripe in sorted_refunds:
         if stripe.external_id in matched_stripe_ids:
             continue
 
-        for qbo in sorted_credits:
+        for qbo in _high_match_candidates(stripe, sorted_credits, credits_index):
             if qbo.external_id in matched_qbo_ids:
                 continue
 
@@ -229,12 +258,13 @@ def reconcile(
 
         best_match = None
 
-        for qbo in sorted_credits:
+        scored = _score_candidates(stripe, sorted_credits, matched_qbo_ids)
+        scored_candidates[stripe.external_id] = _best_scored(scored)
+
+        for qbo, confidence in scored:
             if qbo.external_id in matched_qbo_ids:
                 continue
 
-            confidence = calculate_confidence(stripe, qbo)
-
             if confidence.level == "medium":
                 if best_match is None or confidence.total > best_match[1].total:
                     best_match = (qbo, confidence)
@@ -263,9 +293,14 @@ def reconcile(
         if stripe.external_id in matched_stripe_ids:
             continue
 
-        # Find possible matches from the appropriate QB pool
-        candidates = sorted_credits if getattr(stripe, "transaction_type", "charge") == "refund" else sorted_payments
-        possible = _find_possible_matches(stripe, candidates, matched_qbo_ids)
+        # Possible matches among the best QB candidates kept from phase 2
+        kept = scored_candidates[stripe.external_id]
+        possible = _top_possible_matches(kept, matched_qbo_ids)
+
+        # Too many of the kept ones matched since; rescan the whole pool
+        if len(possible) < MAX_POSSIBLE_MATCHES and len(kept) == KEPT_CANDIDATES:
+            candidates = sorted_credits if getattr(stripe, "transaction_type", "charge") == "refund" else sorted_payments
+            possible = _find_possible_matches(stripe, candidates, matched_qbo_ids)
         days_old = (today - stripe.transaction_date).days
 
         unmatched = UnmatchedTransaction(
@@ -324,8 +359,8 @@ def reconcile(
 
 
 def _create_match(
-    stripe: TransactionCreate,
-    qbo: TransactionCreate,
+    stripe: TxnCore,
+    qbo: TxnCore,
     confidence: ConfidenceBreakdown,
     status: str,
     user_id: str,
@@ -366,11 +401,69 @@ def _create_match(
     return match
 
 
+def _amount_index(transactions: list[TxnCore]) -> list[tuple[float, int]]:
+    """Index transactions by absolute amount as sorted (amount, position) pairs."""
+    return sorted((abs(t.amount), i) for i, t in enumerate(transactions))
+
+
+def _candidates_between(
+    transactions: list[TxnCore],
+    index: list[tuple[float, int]],
+    low: float,
+    high: float,
+) -> list[TxnCore]:
+    """Transactions whose absolute amount is within [low, high], in list order."""
+    start = bisect_left(index, (low, -1))
+    end = bisect_right(index, (high, len(transactions)))
+    return [transactions[i] for i in sorted(i for _, i in index[start:end])]
+
+
+def _high_match_candidates(
+    stripe: TxnCore,
+    qbo_transactions: list[TxnCore],
+    index: list[tuple[float, int]],
+) -> list[TxnCore]:
+    """QB transactions close enough in amount to be a high-confidence match."""
+    if HIGH_MATCH_TOLERANCE is None:
+        return qbo_transactions
+
+    amount = abs(stripe.amount)
+    slack = amount * HIGH_MATCH_TOLERANCE / 100 + AMOUNT_WINDOW_SLACK
+    return _candidates_between(qbo_transactions, index, amount - slack, amount + slack)
+
+
+def _score_candidates(
+    stripe: TxnCore,
+    qbo_transactions: list[TxnCore],
+    matched_qbo_ids: set[str],
+) -> list[tuple[TxnCore, ConfidenceBreakdown]]:
+    """Score every unmatched QB candidate, keeping those with some match potential."""
+    scored: list[tuple[TxnCore, ConfidenceBreakdown]] = []
+
+    for qbo in qbo_transactions:
+        if qbo.external_id in matched_qbo_ids:
+            continue
+
+        confidence = calculate_confidence(stripe, qbo)
+        if confidence.total >= POSSIBLE_MATCH_MIN_SCORE:
+            scored.append((qbo, confidence))
+
+    return scored
+
+
+def _best_scored(
+    scored: list[tuple[TxnCore, ConfidenceBreakdown]],
+) -> list[tuple[TxnCore, ConfidenceBreakdown]]:
+    """The KEPT_CANDIDATES highest totals, ties in candidate order."""
+    return heapq.nlargest(KEPT_CANDIDATES, scored, key=lambda pair: pair[1].total)
+
+
 def _find_fee_adjusted_match(
-    stripe: TransactionCreate,
-    qbo_transactions: list[TransactionCreate],
+    stripe: TxnCore,
+    qbo_transactions: list[TxnCore],
+    index: list[tuple[float, int]],
     matched_qbo_ids: set[str],
-) -> Optional[tuple[TransactionCreate, ConfidenceBreakdown]]:
+) -> Optional[tuple[TxnCore, ConfidenceBreakdown]]:
     """
     Find a match where QBO recorded the net amount after Stripe fees.
 
@@ -384,15 +477,19 @@ def _find_fee_adjusted_match(
     if actual_fee is not None:
         expected_net = stripe.amount - actual_fee
     else:
-        expected_fee = (stripe.amount * settings.stripe_fee_percent / 100) + settings.stripe_fee_fixed
-        expected_net = stripe.amount - expected_fee
+        expected_net = expected_net_amount(stripe.amount)
 
-    for qbo in qbo_transactions:
+    # Only QB amounts near the expected net can pass the tolerance check below
+    tolerance = stripe.amount * FEE_MATCH_TOLERANCE
+    slack = abs(tolerance) + AMOUNT_WINDOW_SLACK
+    candidates = _candidates_between(qbo_transactions, index, expected_net - slack, expected_net + slack)
+
+    for qbo in candidates:
         if qbo.external_id in matched_qbo_ids:
             continue
 
         # Check if QBO amount matches expected net
-        if abs(expected_net - qbo.amount) < (stripe.amount * 0.005):  # Within 0.5%
+        if abs(expected_net - qbo.amount) < tolerance:
             # Check date is reasonable
             days_diff = abs((stripe.transaction_date - qbo.transaction_date).days)
             if days_diff <= settings.date_tolerance_days:
@@ -417,13 +514,13 @@ def _find_fee_adjusted_match(
 
 
 def _find_possible_matches(
-    transaction: TransactionCreate,
-    candidates: list[TransactionCreate],
+    transaction: TxnCore,
+    candidates: list[TxnCore],
     exclude_ids: set[str],
     reverse: bool = False,
 ) -> list[PossibleMatch]:
     """Find possible match candidates for an unmatched transaction."""
-    possible: list[PossibleMatch] = []
+    scored: list[tuple[TxnCore, ConfidenceBreakdown]] = []
 
     for candidate in candidates:
         if candidate.external_id in exclude_ids:
@@ -435,8 +532,24 @@ def _find_possible_matches(
         else:
             confidence = calculate_confidence(transaction, candidate)
 
+        scored.append((candidate, confidence))
+
+    return _top_possible_matches(scored, exclude_ids)
+
+
+def _top_possible_matches(
+    scored: list[tuple[TxnCore, ConfidenceBreakdown]],
+    exclude_ids: set[str],
+) -> list[PossibleMatch]:
+    """Turn scored candidates into the top MAX_POSSIBLE_MATCHES possible matches."""
+    possible: list[PossibleMatch] = []
+
+    for candidate, confidence in scored:
+        if candidate.external_id in exclude_ids:
+            continue
+
         # Include if there's some match potential
-        if confidence.total >= 30:
+        if confidence.total >= POSSIBLE_MATCH_MIN_SCORE:
             why_not = _generate_why_not_matched(confidence)
             possible.append(PossibleMatch(
                 transaction=candidate,
@@ -444,9 +557,9 @@ def _find_possible_matches(
                 why_not_auto_matched=why_not,
             ))
 
-    # Sort by confidence and take top 3
+    # Sort by confidence and take the top few
     possible.sort(key=lambda p: p.confidence.total, reverse=True)
-    return possible[:3]
+    return possible[:MAX_POSSIBLE_MATCHES]
 
 
 def _generate_why_not_matched(confidence: ConfidenceBreakdown) -> str:
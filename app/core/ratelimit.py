@@ -0,0 +1,45 @@
+# app/core/ratelimit.py
+
+"""
+Client-side rate limiting for outbound API calls.
+
+A sliding-window limiter keyed by an arbitrary string, so bursts of syncs
+queue up locally instead of tripping the provider's limits and failing.
+Limits are tracked in-process (per worker).
+"""
+
+import asyncio
+import time
+from collections import defaultdict, deque
+
+_windows: dict[str, deque[float]] = defaultdict(deque)
+_locks: dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+
+async def acquire(key: str, limit: int, period: float = 1.0) -> None:
+    """
+    Wait until a request under `key` is allowed, then record it.
+
+    Admits at most `limit` requests per `period` seconds for each key.
+    Waiters are admitted in arrival order.
+    """
+    async with _locks[key]:
+        window = _windows[key]
+        while True:
+            now = time.monotonic()
+            while window and window[0] <= now - period:
+                window.popleft()
+
+            if len(window) < limit:
+                window.append(now)
+                return
+
+            await asyncio.sleep(window[0] + period - now)
+
+
+def retry_after(key: str, limit: int, period: float = 1.0) -> float:
+    """Seconds until acquire() would admit a request under `key` without waiting."""
+    window = _windows.get(key)
+    if not window or len(window) < limit:
+        return 0.0
+    return max(0.0, window[-limit] + period - time.monotonic())
@@ -1,7 +1,18 @@
 # app/database.py
 
-from supabase import create_client, Client
+import asyncio
+import base64
+import binascii
+import uuid
+from datetime import date, datetime
+from typing import AsyncIterator
+
+from postgrest import CountMethod, ReturnMethod
+from pydantic import TypeAdapter
+from supabase import acreate_client, create_client, AsyncClient, Client
+from app.cache import invalidate, invalidate_prefix
 from app.config import get_settings
+from app.models import TransactionCreate
 
 settings = get_settings()
 
@@ -11,20 +22,62 @@ supabase: Client = create_client(
     settings.supabase_anon_key
 )
 
-# Admin client (bypasses RLS - use carefully)
-supabase_admin: Client = create_client(
-    settings.supabase_url,
-    settings.supabase_service_role_key
-)
+# Admin client (bypasses RLS - use carefully). Async, created once at
+# startup by init_db() so every request shares its HTTP connection pool.
+supabase_admin: AsyncClient | None = None
+
+
+async def init_db() -> None:
+    """Create the shared admin client. Called from the app lifespan."""
+    global supabase_admin
+    supabase_admin = await acreate_client(
+        settings.supabase_url,
+        settings.supabase_service_role_key,
+    )
+
+
+async def close_db() -> None:
+    """Close the shared admin client's connection pool."""
+    if supabase_admin is not None:
+        await supabase_admin.postgrest.aclose()
+
+
+# Rows sent per upsert request; keeps request bodies bounded on large syncs
+UPSERT_BATCH_SIZE = 1000
+
+# Built once at import; dumps a whole sync's transactions in one pydantic-core call
+_TRANSACTION_ROWS = TypeAdapter(list[TransactionCreate])
+
+# Rows fetched per database round-trip when streaming matches
+STREAM_PAGE_SIZE = 200
 
 
 # ============================================
 # Database helper functions
 # ============================================
 
+async def _upsert_batched(table: str, rows: list[dict], on_conflict: str) -> int:
+    """
+    Upsert rows in fixed-size batches, one request per batch.
+
+    Each batch is a single multi-row INSERT ... ON CONFLICT DO UPDATE.
+    Rows are not echoed back; only the affected-row count is returned.
+    """
+    saved = 0
+    for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+        response = await supabase_admin.table(table).upsert(
+            rows[start:start + UPSERT_BATCH_SIZE],
+            on_conflict=on_conflict,
+            count=CountMethod.exact,
+            returning=ReturnMethod.minimal,
+        ).execute()
+        saved += response.count or 0
+    return saved
+
+
 async def get_user_connections(user_id: str) -> dict:
     """Get all connections for a user."""
-    response = supabase_admin.table("connections").select("*").eq("user_id", user_id).execute()
+    response = await supabase_admin.table("connections").select("*").eq("user_id", user_id).execute()
     
     connections = {"stripe": None, "quickbooks": None}
     for conn in response.data:
@@ -32,6 +85,11 @@ async def get_user_connections(user_id: str) -> dict:
     return connections
 
 
+def connection_cache_key(user_id: str, service: str) -> str:
+    """Cache key for a user's connection row."""
+    return f"conn:{user_id}:{service}"
+
+
 async def save_connection(
     user_id: str,
     service: str,
@@ -49,58 +107,114 @@ async def save_connection(
         "status": "active",
     }
     
-    response = supabase_admin.table("connections").upsert(
+    # Invalidate on both sides of the write: a status poll that reads
+    # during the upsert can re-cache the old row after the first one
+    invalidate(connection_cache_key(user_id, service))
+    response = await supabase_admin.table("connections").upsert(
         data,
         on_conflict="user_id,service"
     ).execute()
+    invalidate(connection_cache_key(user_id, service))
     
     return response.data[0] if response.data else None
 
 
 async def get_connection(user_id: str, service: str) -> dict | None:
     """Get a specific connection."""
-    response = supabase_admin.table("connections").select("*").eq("user_id", user_id).eq("service", service).execute()
+    response = await supabase_admin.table("connections").select("*").eq("user_id", user_id).eq("service", service).execute()
     return response.data[0] if response.data else None
 
 
+async def get_connections_bulk(user_id: str, services: list[str]) -> dict[str, dict]:
+    """Get several connections in one query, keyed by service."""
+    response = await (
+        supabase_admin.table("connections")
+        .select("*")
+        .eq("user_id", user_id)
+        .in_("service", services)
+        .execute()
+    )
+    return {conn["service"]: conn for conn in response.data}
+
+
 async def delete_connection(user_id: str, service: str) -> bool:
     """Delete a connection (disconnect a service)."""
-    response = supabase_admin.table("connections").delete().eq("user_id", user_id).eq("service", service).execute()
+    invalidate(connection_cache_key(user_id, service))
+    response = await supabase_admin.table("connections").delete().eq("user_id", user_id).eq("service", service).execute()
+    invalidate(connection_cache_key(user_id, service))
     return len(response.data) > 0 if response.data else False
 
 
-async def save_transactions(user_id: str, transactions: list[dict]) -> int:
+async def save_transactions(user_id: str, transactions: list[TransactionCreate]) -> int:
     """Save transactions to database."""
     if not transactions:
         return 0
-    
-    # Add user_id to each transaction
-    for txn in transactions:
-        txn["user_id"] = user_id
-    
-    response = supabase_admin.table("transactions").upsert(
-        transactions,
-        on_conflict="user_id,source,external_id"
-    ).execute()
-    
-    return len(response.data) if response.data else 0
 
+    # JSON-ready rows (dates as ISO strings), plus the owning user
+    rows = _TRANSACTION_ROWS.dump_python(transactions, mode="json")
+    for row in rows:
+        row["user_id"] = user_id
+
+    saved = await _upsert_batched("transactions", rows, "user_id,source,external_id")
+    invalidate_prefix(transaction_count_prefix(user_id))
+    return saved
 
-async def get_transactions(user_id: str, source: str = None, transaction_type: str = None, customer_id: str = None) -> list[dict]:
-    """Get transactions for a user."""
-    query = supabase_admin.table("transactions").select("*").eq("user_id", user_id)
 
+def _filter_transactions(query, source: str = None, transaction_type: str = None, customer_id: str = None):
+    """Apply the optional transaction filters shared by list and count queries."""
     if source:
         query = query.eq("source", source)
     if transaction_type:
         query = query.eq("transaction_type", transaction_type)
     if customer_id:
         query = query.eq("customer_id", customer_id)
+    return query
+
 
-    response = query.order("transaction_date", desc=True).execute()
+async def get_transactions(user_id: str, source: str = None, transaction_type: str = None, customer_id: str = None) -> list[dict]:
+    """Get transactions for a user."""
+    query = supabase_admin.table("transactions").select("*").eq("user_id", user_id)
+    query = _filter_transactions(query, source, transaction_type, customer_id)
+
+    response = await query.order("transaction_date", desc=True).execute()
     return response.data
 
 
+async def get_transactions_page(
+    user_id: str,
+    source: str = None,
+    customer_id: str = None,
+    limit: int = 500,
+    cursor: str = None,
+) -> tuple[list[dict], str | None]:
+    """
+    Get one keyset page of transactions, newest first.
+
+    Ordered by (transaction_date, id) descending, like get_matches_page.
+    Returns the rows and the cursor for the next page (None on the last
+    page). Raises ValueError on a malformed cursor.
+    """
+    query = supabase_admin.table("transactions").select("*").eq("user_id", user_id)
+    query = _filter_transactions(query, source, customer_id=customer_id)
+    return await _keyset_page(query, "transaction_date", limit, cursor)
+
+
+def transaction_count_prefix(user_id: str) -> str:
+    """Cache key prefix shared by all of a user's transaction counts."""
+    return f"txn_count:{user_id}:"
+
+
+async def count_transactions(user_id: str, source: str = None, customer_id: str = None) -> int:
+    """Count a user's transactions without fetching any rows."""
+    query = (
+        supabase_admin.table("transactions")
+        .select("id", count="exact", head=True)
+        .eq("user_id", user_id)
+    )
+    response = await _filter_transactions(query, source, customer_id=customer_id).execute()
+    return response.count or 0
+
+
 async def save_matches(user_id: str, matches: list[dict]) -> int:
     """Save matches to database."""
     if not matches:
@@ -109,12 +223,96 @@ async def save_matches(user_id: str, matches: list[dict]) -> int:
     for match in matches:
         match["user_id"] = user_id
     
-    response = supabase_admin.table("matches").upsert(
-        matches,
-        on_conflict="user_id,stripe_external_id,qbo_external_id"
-    ).execute()
-    
-    return len(response.data) if response.data else 0
+    return await _upsert_batched("matches", matches, "user_id,stripe_external_id,qbo_external_id")
+
+
+def encode_cursor(sort_value: str, row_id: str) -> str:
+    """Encode a keyset position as an opaque, URL-safe cursor."""
+    return base64.urlsafe_b64encode(f"{sort_value}|{row_id}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[str, str]:
+    """
+    Decode a cursor from encode_cursor. Raises ValueError if malformed.
+
+    The sort value must be an ISO date or timestamp and the id a UUID or
+    an integer. Both are returned re-serialized, so they are safe to
+    splice into a PostgREST filter.
+    """
+    try:
+        sort_value, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return _parse_sort_value(sort_value), _parse_row_id(row_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("Invalid cursor")
+
+
+def _parse_sort_value(value: str) -> str:
+    """Normalize a cursor's sort value, a date or a timestamp, to ISO format."""
+    try:
+        return date.fromisoformat(value).isoformat()
+    except ValueError:
+        return datetime.fromisoformat(value).isoformat()
+
+
+def _parse_row_id(value: str) -> str:
+    """
+    Normalize a cursor's row id.
+
+    Match ids are UUIDs generated by the matching engine. Transaction ids
+    are assigned by the database, so integer identity keys are accepted too.
+    """
+    try:
+        return str(uuid.UUID(value))
+    except ValueError:
+        if value.isascii() and value.isdigit():
+            return str(int(value))
+        raise
+
+
+def _after_cursor(query, column: str, cursor: str):
+    """Restrict a query ordered by (column, id) descending to rows after cursor."""
+    value, row_id = decode_cursor(cursor)
+    return query.or_(
+        f'{column}.lt."{value}",'
+        f'and({column}.eq."{value}",id.lt."{row_id}")'
+    )
+
+
+async def _keyset_page(query, column: str, limit: int, cursor: str = None) -> tuple[list[dict], str | None]:
+    """
+    Run one keyset page of a query, ordered by (column, id) descending.
+
+    Returns the rows and the cursor for the next page (None on the last
+    page). Raises ValueError on a malformed cursor.
+    """
+    if cursor:
+        query = _after_cursor(query, column, cursor)
+
+    # Fetch one extra row to learn whether another page exists
+    response = await (
+        query.order(column, desc=True)
+        .order("id", desc=True)
+        .limit(limit + 1)
+        .execute()
+    )
+
+    rows = response.data
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1][column], rows[-1]["id"])
+
+
+def _filter_matches(query, status: str = None, has_discrepancy: bool = None, severity: str = None):
+    """Apply the optional match list filters to a query."""
+    if status:
+        query = query.eq("status", status)
+    if has_discrepancy is not None:
+        query = query.eq("has_discrepancy", has_discrepancy)
+    if severity:
+        query = query.eq("discrepancy_severity", severity)
+    return query
 
 
 async def get_matches(
@@ -127,52 +325,157 @@ async def get_matches(
 ) -> tuple[list[dict], int]:
     """Get matches with filters."""
     query = supabase_admin.table("matches").select("*", count="exact").eq("user_id", user_id)
+    query = _filter_matches(query, status, has_discrepancy, severity)
     
-    if status:
-        query = query.eq("status", status)
-    if has_discrepancy is not None:
-        query = query.eq("has_discrepancy", has_discrepancy)
-    if severity:
-        query = query.eq("discrepancy_severity", severity)
-    
-    response = query.order("matched_at", desc=True).range(offset, offset + limit - 1).execute()
+    response = await (
+        query.order("matched_at", desc=True)
+        .order("id", desc=True)
+        .range(offset, offset + limit - 1)
+        .execute()
+    )
     
     return response.data, response.count
 
 
+async def get_matches_page(
+    user_id: str,
+    status: str = None,
+    has_discrepancy: bool = None,
+    severity: str = None,
+    limit: int = 50,
+    cursor: str = None,
+) -> tuple[list[dict], str | None]:
+    """
+    Get one keyset page of matches, newest first.
+
+    Rows are ordered by (matched_at, id) descending and the page starts
+    strictly after the position encoded in `cursor`, so the cost of a page
+    does not grow with how deep into the list it is. Returns the rows and
+    the cursor for the next page (None on the last page).
+    """
+    query = supabase_admin.table("matches").select("*").eq("user_id", user_id)
+    query = _filter_matches(query, status, has_discrepancy, severity)
+    return await _keyset_page(query, "matched_at", limit, cursor)
+
+
+async def stream_matches(
+    user_id: str,
+    status: str = None,
+    has_discrepancy: bool = None,
+    severity: str = None,
+    cursor: str = None,
+    page_size: int = STREAM_PAGE_SIZE,
+) -> AsyncIterator[dict]:
+    """
+    Yield matches newest first, one keyset page per round-trip.
+
+    Only a single page is held in memory at a time. Starts after `cursor`
+    if given; raises ValueError on a malformed cursor.
+    """
+    while True:
+        page, cursor = await get_matches_page(
+            user_id=user_id,
+            status=status,
+            has_discrepancy=has_discrepancy,
+            severity=severity,
+            limit=page_size,
+            cursor=cursor,
+        )
+        for row in page:
+            yield row
+
+        if cursor is None:
+            return
+
+
+async def get_discrepancy_summary(user_id: str) -> dict:
+    """
+    Count a user's discrepancies by severity.
+
+    Issues count-only queries (no rows returned) concurrently: one per
+    severity plus one for the overall total.
+    """
+    def count_query(severity: str = None):
+        query = (
+            supabase_admin.table("matches")
+            .select("id", count="exact", head=True)
+            .eq("user_id", user_id)
+            .eq("has_discrepancy", True)
+        )
+        if severity:
+            query = query.eq("discrepancy_severity", severity)
+        return query.execute()
+
+    critical, warning, info, total = await asyncio.gather(
+        count_query("critical"),
+        count_query("warning"),
+        count_query("info"),
+        count_query(),
+    )
+
+    return {
+        "critical": critical.count or 0,
+        "warning": warning.count or 0,
+        "info": info.count or 0,
+        "total": total.count or 0,
+    }
+
+
 async def get_match(match_id: str, user_id: str) -> dict | None:
     """Get a single match."""
-    response = supabase_admin.table("matches").select("*").eq("id", match_id).eq("user_id", user_id).execute()
+    response = await supabase_admin.table("matches").select("*").eq("id", match_id).eq("user_id", user_id).execute()
     return response.data[0] if response.data else None
 
 
-async def update_match(match_id: str, updates: dict) -> dict | None:
-    """Update a match."""
-    response = supabase_admin.table("matches").update(updates).eq("id", match_id).execute()
+async def update_match(match_id: str, user_id: str, updates: dict) -> dict | None:
+    """Update one of a user's matches and return the updated row."""
+    response = await (
+        supabase_admin.table("matches")
+        .update(updates)
+        .eq("id", match_id)
+        .eq("user_id", user_id)
+        .execute()
+    )
     return response.data[0] if response.data else None
 
 
 async def save_resolution(resolution: dict) -> dict:
     """Save a resolution."""
-    response = supabase_admin.table("resolutions").insert(resolution).execute()
+    response = await supabase_admin.table("resolutions").insert(resolution).execute()
     return response.data[0] if response.data else None
 
 
+async def delete_resolution(resolution_id: str) -> None:
+    """Delete a resolution, e.g. one whose match update failed."""
+    await supabase_admin.table("resolutions").delete().eq("id", resolution_id).execute()
+
+
 async def get_user_resolutions(user_id: str, limit: int = 50) -> list[dict]:
     """Get user's resolution history."""
-    response = supabase_admin.table("resolutions").select("*").eq("user_id", user_id).order("resolved_at", desc=True).limit(limit).execute()
+    response = await supabase_admin.table("resolutions").select("*").eq("user_id", user_id).order("resolved_at", desc=True).limit(limit).execute()
     return response.data
 
 
+def history_cache_prefix(user_id: str) -> str:
+    """Cache key prefix shared by all of a user's history pages."""
+    return f"reco_hist:{user_id}:"
+
+
+def history_cache_key(user_id: str, limit: int) -> str:
+    """Cache key for a user's reconciliation history at a given limit."""
+    return f"{history_cache_prefix(user_id)}{limit}"
+
+
 async def save_reconciliation_run(run: dict) -> dict:
     """Save a reconciliation run."""
-    response = supabase_admin.table("reconciliation_runs").insert(run).execute()
+    response = await supabase_admin.table("reconciliation_runs").insert(run).execute()
+    invalidate_prefix(history_cache_prefix(run["user_id"]))
     return response.data[0] if response.data else None
 
 
 async def get_reconciliation_history(user_id: str, limit: int = 30) -> list[dict]:
     """Get reconciliation run history for a user."""
-    response = (
+    response = await (
         supabase_admin.table("reconciliation_runs")
         .select("*")
         .eq("user_id", user_id)
@@ -9,24 +9,24 @@ Validates Supabase JWTs and extracts user_id for all protected endpoints.
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
-from app.database import supabase_admin
+from app import database
 
 security = HTTPBearer()
 
 
-def get_current_user(
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
 ) -> str:
     """
     Validate the Supabase JWT and return the user_id.
 
-    Uses supabase_admin.auth.get_user() to verify the token.
-    This is a sync function -- FastAPI auto-runs it in a threadpool.
+    Uses the shared async admin client's auth.get_user() to verify the
+    token, so no threadpool worker is tied up per request.
     """
     token = credentials.credentials
 
     try:
-        user_response = supabase_admin.auth.get_user(token)
+        user_response = await database.supabase_admin.auth.get_user(token)
     except Exception:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -10,6 +10,7 @@ Uses Anthropic's Claude API to:
 """
 
 import json
+import logging
 from typing import Optional
 from anthropic import Anthropic
 
@@ -17,6 +18,7 @@ from app.config import get_settings
 from app.models import MatchDB, Resolution
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
 
 # Initialize client
 client = Anthropic(api_key=settings.anthropic_api_key)
@@ -25,11 +27,13 @@ client = Anthropic(api_key=settings.anthropic_api_key)
 MODEL = "claude-sonnet-4-20250514"
 
 
-async def explain_discrepancy(match: MatchDB) -> str:
+async def explain_discrepancy(match: MatchDB, fallback: bool = True) -> Optional[str]:
     """
     Generate a human-readable explanation for a discrepancy.
     
     Takes a match with a discrepancy and returns a clear, actionable explanation.
+    If Claude can't be reached, returns default_explanation(), or None when
+    fallback is False.
     """
     if not settings.enable_ai_explanations:
         return match.discrepancy_explanation or ""
@@ -64,19 +68,23 @@ Don't repeat the data - focus on what happened and what to do."""
             messages=[{"role": "user", "content": prompt}]
         )
         return response.content[0].text
-    except Exception as e:
+    except Exception:
         # Fall back to system explanation
-        print(f"Claude API error: {e}")
-        return match.discrepancy_explanation or "Review this discrepancy manually."
+        logger.exception("Claude explanation request failed")
+        return default_explanation(match) if fallback else None
 
 
 async def suggest_resolution(
     match: MatchDB,
     user_history: list[Resolution],
-) -> dict:
+    fallback: bool = True,
+) -> Optional[dict]:
     """
     Suggest a resolution based on user's past behavior.
     
+    If Claude can't be reached, returns default_suggestion(), or None when
+    fallback is False.
+    
     Returns:
         {
             "action": "mark_as_expected" | "flag_for_review" | etc,
@@ -138,10 +146,10 @@ Respond with JSON only: {{"action": "...", "confidence": 0.0-1.0, "reason": "...
             text = text.rsplit("\n", 1)[0]
         
         return json.loads(text)
-    except Exception as e:
-        print(f"Claude API error: {e}")
+    except Exception:
+        logger.exception("Claude suggestion request failed")
         # Default suggestion based on discrepancy type
-        return _get_default_suggestion(match)
+        return default_suggestion(match) if fallback else None
 
 
 async def batch_explain(matches: list[MatchDB]) -> list[str]:
@@ -186,7 +194,12 @@ async def detect_anomaly(
     return None
 
 
-def _get_default_suggestion(match: MatchDB) -> dict:
+def default_explanation(match: MatchDB) -> str:
+    """Explanation to show when Claude is unavailable."""
+    return match.discrepancy_explanation or "Review this discrepancy manually."
+
+
+def default_suggestion(match: MatchDB) -> dict:
     """Get default suggestion based on discrepancy type."""
     
     type_to_action = {
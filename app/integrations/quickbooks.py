@@ -4,7 +4,10 @@
 QuickBooks Online integration for OAuth and transaction syncing.
 """
 
+import asyncio
 import logging
+import random
+from collections import Counter
 from datetime import datetime, timedelta
 from typing import Optional
 from urllib.parse import urlencode
@@ -12,6 +15,7 @@ import base64
 import httpx
 
 from app.config import get_settings
+from app.core import ratelimit
 from app.models import TransactionCreate
 
 settings = get_settings()
@@ -27,6 +31,31 @@ if settings.quickbooks_environment == "sandbox":
     QBO_API_BASE = "https://sandbox-quickbooks.api.intuit.com/v3/company"
 
 
+# Query paging: QBO caps MAXRESULTS at 1000 per page
+QBO_MAX_RESULTS = 1000
+QBO_PAGE_CONCURRENCY = 8
+QBO_MAX_RETRIES = 5
+
+# QBO allows 500 requests/minute per realm (company)
+QBO_REQUESTS_PER_MINUTE = 500
+
+# Fault codes in QBO error bodies: AuthenticationFailed, ThrottleExceeded
+QBO_AUTH_FAULT_CODES = frozenset({"3200"})
+QBO_THROTTLE_FAULT_CODES = frozenset({"3001"})
+
+
+class QBOTokenExpired(Exception):
+    """QuickBooks rejected the access token; refresh it and retry."""
+
+
+class QBOThrottled(Exception):
+    """QuickBooks is throttling the realm; retry_after is in seconds, if known."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
 def get_oauth_url(user_id: str) -> str:
     """
     Generate QuickBooks OAuth URL.
@@ -119,60 +148,138 @@ async def refresh_access_token(refresh_token: str) -> dict:
 # Pagination Helper
 # ============================================
 
+def _rate_limit_key(realm_id: str) -> str:
+    """Client-side rate limit key for a realm."""
+    return f"qbo:{realm_id}"
+
+
+def _qbo_error(response: httpx.Response) -> Exception:
+    """Map a failed QBO response to the exception to raise, by status and fault code."""
+    try:
+        errors = response.json()["Fault"]["Error"]
+        code = str(errors[0].get("code")) if errors else None
+    except (ValueError, KeyError, TypeError):
+        code = None
+
+    if response.status_code == 401 or code in QBO_AUTH_FAULT_CODES:
+        return QBOTokenExpired("QuickBooks token expired")
+
+    if response.status_code == 429 or code in QBO_THROTTLE_FAULT_CODES:
+        retry_after = response.headers.get("Retry-After")
+        return QBOThrottled(
+            "QuickBooks rate limit exceeded",
+            retry_after=float(retry_after) if retry_after and retry_after.isdigit() else None,
+        )
+
+    return Exception(f"QuickBooks API error: {response.text}")
+
+
+async def _qbo_query(
+    client: httpx.AsyncClient,
+    access_token: str,
+    realm_id: str,
+    query: str,
+) -> dict:
+    """
+    Run one QBO query under the realm's rate limit, backing off and
+    retrying when throttled.
+
+    Waits for Retry-After when given (capped at the exponential backoff
+    for that attempt), up to QBO_MAX_RETRIES times, then raises
+    QBOThrottled. Raises QBOTokenExpired when the token is rejected.
+    """
+    for attempt in range(QBO_MAX_RETRIES + 1):
+        await ratelimit.acquire(_rate_limit_key(realm_id), QBO_REQUESTS_PER_MINUTE, 60)
+        response = await client.get(
+            f"{QBO_API_BASE}/{realm_id}/query",
+            headers={
+                "Authorization": f"Bearer {access_token}",
+                "Accept": "application/json",
+            },
+            params={"query": query},
+        )
+
+        if response.status_code == 200:
+            return response.json().get("QueryResponse", {})
+
+        error = _qbo_error(response)
+        if not isinstance(error, QBOThrottled):
+            raise error
+
+        if attempt == QBO_MAX_RETRIES:
+            # No upstream hint: fall back to when our own limiter frees a slot
+            if error.retry_after is None:
+                error.retry_after = ratelimit.retry_after(
+                    _rate_limit_key(realm_id), QBO_REQUESTS_PER_MINUTE, 60,
+                )
+            raise error
+
+        backoff = 2 ** attempt + random.random()
+        delay = min(error.retry_after, backoff) if error.retry_after is not None else backoff
+        logger.warning(f"QBO rate limited, retrying in {delay:.1f}s")
+        await asyncio.sleep(delay)
+
+
 async def _paginate_qbo_query(
     access_token: str,
     realm_id: str,
     entity: str,
     date_filter: str,
-    max_results: int = 100,
+    max_results: int = QBO_MAX_RESULTS,
 ) -> list[dict]:
     """
     Paginate through a QuickBooks query using STARTPOSITION + MAXRESULTS.
 
-    Returns all items across all pages.
+    Fetches the first page; if it is full, asks QBO for the total count
+    and fetches the remaining pages concurrently (at most
+    QBO_PAGE_CONCURRENCY in flight). If any page fails, the rest are
+    cancelled and that page's error is raised. Returns all items across
+    all pages, in page order.
     """
-    all_items = []
-    start_position = 1
+    where = f"WHERE TxnDate >= '{date_filter}'"
+    semaphore = asyncio.Semaphore(QBO_PAGE_CONCURRENCY)
 
     async with httpx.AsyncClient() as client:
-        while True:
-            query = (
-                f"SELECT * FROM {entity} "
-                f"WHERE TxnDate >= '{date_filter}' "
-                f"STARTPOSITION {start_position} MAXRESULTS {max_results}"
-            )
 
-            response = await client.get(
-                f"{QBO_API_BASE}/{realm_id}/query",
-                headers={
-                    "Authorization": f"Bearer {access_token}",
-                    "Accept": "application/json",
-                },
-                params={"query": query},
+        async def fetch_page(start_position: int) -> list[dict]:
+            async with semaphore:
+                data = await _qbo_query(
+                    client, access_token, realm_id,
+                    f"SELECT * FROM {entity} {where} "
+                    f"STARTPOSITION {start_position} MAXRESULTS {max_results}",
+                )
+            return data.get(entity, [])
+
+        pages = [await fetch_page(1)]
+
+        # A short first page is the whole result set
+        if len(pages[0]) == max_results:
+            count = await _qbo_query(
+                client, access_token, realm_id,
+                f"SELECT COUNT(*) FROM {entity} {where}",
             )
+            total = count.get("totalCount", 0)
 
-            if response.status_code == 401:
-                raise Exception("QuickBooks token expired")
-
-            if response.status_code != 200:
-                raise Exception(f"QuickBooks API error ({entity}): {response.text}")
-
-            data = response.json()
-            items = data.get("QueryResponse", {}).get(entity, [])
-            all_items.extend(items)
-
-            # If fewer items returned than max, we've reached the end
-            if len(items) < max_results:
-                break
+            # A TaskGroup cancels the other pages as soon as one fails (e.g. a
+            # dead token), instead of letting them keep spending the quota
+            try:
+                async with asyncio.TaskGroup() as group:
+                    tasks = [
+                        group.create_task(fetch_page(start_position))
+                        for start_position in range(1 + max_results, total + 1, max_results)
+                    ]
+            except ExceptionGroup as error:
+                # Surface the first failure itself, so callers can still
+                # catch QBOTokenExpired / QBOThrottled
+                raise error.exceptions[0] from None
 
-            start_position += max_results
+            pages += [task.result() for task in tasks]
 
-            # Safety limit
-            if len(all_items) > 10000:
-                logger.warning(f"QBO pagination hit 10,000 item safety limit for {entity}")
-                break
+            # Rows added since the count: keep going while pages come back full
+            while len(pages[-1]) == max_results:
+                pages.append(await fetch_page(1 + len(pages) * max_results))
 
-    return all_items
+    return [item for items in pages for item in items]
 
 
 # ============================================
@@ -329,9 +436,7 @@ async def fetch_transactions(
         transactions.append(txn)
 
     # Log summary
-    counts = {}
-    for t in transactions:
-        counts[t.transaction_type] = counts.get(t.transaction_type, 0) + 1
+    counts = Counter(t.transaction_type for t in transactions)
     logger.info(
         f"Fetched from QuickBooks: "
         + ", ".join(f"{count} {ttype}s" for ttype, count in counts.items())
@@ -346,6 +451,7 @@ async def verify_connection(access_token: str, realm_id: str) -> dict:
 
     Returns company info if valid.
     """
+    await ratelimit.acquire(_rate_limit_key(realm_id), QBO_REQUESTS_PER_MINUTE, 60)
     async with httpx.AsyncClient() as client:
         response = await client.get(
             f"{QBO_API_BASE}/{realm_id}/companyinfo/{realm_id}",
@@ -355,7 +461,7 @@ async def verify_connection(access_token: str, realm_id: str) -> dict:
             },
         )
 
-        if response.status_code == 401:
+        if response.status_code != 200 and isinstance(_qbo_error(response), QBOTokenExpired):
             return {"valid": False, "error": "Token expired"}
 
         if response.status_code != 200:
@@ -4,12 +4,16 @@
 Stripe integration for OAuth and transaction syncing.
 """
 
+import asyncio
+import hashlib
 import logging
+import random
 from datetime import datetime, timedelta
 from typing import Optional
 import stripe
 
 from app.config import get_settings
+from app.core import ratelimit
 from app.models import TransactionCreate
 
 settings = get_settings()
@@ -18,6 +22,14 @@ logger = logging.getLogger(__name__)
 # Configure Stripe
 stripe.api_key = settings.stripe_secret_key
 
+# OAuth values are fixed for the process lifetime; bind them once
+_STRIPE_CLIENT_ID = settings.stripe_client_id
+_REDIRECT_URI = f"{settings.api_url}/auth/stripe/callback"
+
+# Stripe allows 100 read requests/second per account in live mode; stay just under it
+STRIPE_REQUESTS_PER_SECOND = 90
+STRIPE_MAX_RETRIES = 5
+
 
 def get_oauth_url(user_id: str) -> str:
     """
@@ -26,11 +38,11 @@ def get_oauth_url(user_id: str) -> str:
     The user_id is passed as state and returned in the callback.
     """
     params = {
-        "client_id": settings.stripe_client_id,
+        "client_id": _STRIPE_CLIENT_ID,
         "state": user_id,
         "scope": "read_write",
         "response_type": "code",
-        "redirect_uri": f"{settings.api_url}/auth/stripe/callback",
+        "redirect_uri": _REDIRECT_URI,
         "stripe_landing": "login",
     }
 
@@ -45,7 +57,9 @@ async def exchange_code(code: str) -> str:
     Returns the access token.
     """
     try:
-        response = stripe.OAuth.token(
+        # The SDK has no async OAuth call; keep it off the event loop
+        response = await asyncio.to_thread(
+            stripe.OAuth.token,
             grant_type="authorization_code",
             code=code,
         )
@@ -58,7 +72,37 @@ async def exchange_code(code: str) -> str:
 # Pagination & Customer Resolution Helpers
 # ============================================
 
-def _paginate_stripe_list(resource_method, params: dict) -> list:
+def _rate_limit_key(access_token: str) -> str:
+    """
+    Client-side rate limit key for the connected account behind a token.
+
+    Each connected account has its own OAuth access token, so a digest of
+    the token identifies the account without keeping the secret as a key.
+    """
+    return f"stripe:{hashlib.sha256(access_token.encode()).hexdigest()[:16]}"
+
+
+async def _call_stripe(account_key: str, method, *args, **kwargs):
+    """
+    Await an async Stripe client method (e.g. `list_async`) under the
+    connected account's rate limit (see _rate_limit_key).
+
+    Rate-limited calls are retried with exponential backoff plus jitter;
+    the last RateLimitError is re-raised once retries run out.
+    """
+    for attempt in range(STRIPE_MAX_RETRIES):
+        await ratelimit.acquire(account_key, STRIPE_REQUESTS_PER_SECOND)
+        try:
+            return await method(*args, **kwargs)
+        except stripe.error.RateLimitError:
+            if attempt == STRIPE_MAX_RETRIES - 1:
+                raise
+            delay = 2 ** attempt + random.random()
+            logger.warning(f"Stripe rate limited, retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+
+async def _paginate_stripe_list(account_key: str, resource_method, params: dict) -> list:
     """
     Paginate through a Stripe list endpoint using starting_after cursor.
 
@@ -73,7 +117,7 @@ def _paginate_stripe_list(resource_method, params: dict) -> list:
         if starting_after:
             params["starting_after"] = starting_after
 
-        response = resource_method(params=params)
+        response = await _call_stripe(account_key, resource_method, params=params)
 
         items = response.data
         all_items.extend(items)
@@ -84,15 +128,10 @@ def _paginate_stripe_list(resource_method, params: dict) -> list:
         else:
             break
 
-        # Safety limit
-        if len(all_items) > 10000:
-            logger.warning("Stripe pagination hit 10,000 item safety limit")
-            break
-
     return all_items
 
 
-def _resolve_customer_names(client, customer_ids: set) -> dict:
+async def _resolve_customer_names(client, account_key: str, customer_ids: set) -> dict:
     """
     Batch-resolve customer display names from Stripe.
 
@@ -103,7 +142,7 @@ def _resolve_customer_names(client, customer_ids: set) -> dict:
         if not cid or cid in cache:
             continue
         try:
-            customer = client.v1.customers.retrieve(cid)
+            customer = await _call_stripe(account_key, client.v1.customers.retrieve_async, cid)
             cache[cid] = customer.name or customer.email or cid
         except Exception:
             cache[cid] = cid
@@ -134,6 +173,7 @@ async def fetch_transactions(
         List of normalized transactions (charges + refunds)
     """
     client = stripe.StripeClient(access_token)
+    account_key = _rate_limit_key(access_token)
 
     since = datetime.now() - timedelta(days=days)
     since_timestamp = int(since.timestamp())
@@ -144,14 +184,15 @@ async def fetch_transactions(
         # ============================
         # 1. Fetch all charges (paginated)
         # ============================
-        all_charges = _paginate_stripe_list(
-            client.v1.charges.list,
+        all_charges = await _paginate_stripe_list(
+            account_key,
+            client.v1.charges.list_async,
             {"limit": 100, "created": {"gte": since_timestamp}},
         )
 
         # Batch-resolve customer names
         customer_ids = {c.customer for c in all_charges if c.customer}
-        customer_names = _resolve_customer_names(client, customer_ids)
+        customer_names = await _resolve_customer_names(client, account_key, customer_ids)
 
         for charge in all_charges:
             if charge.status != "succeeded":
@@ -164,7 +205,11 @@ async def fetch_transactions(
             net_amount = None
             if charge.balance_transaction:
                 try:
-                    bal_txn = client.v1.balance_transactions.retrieve(charge.balance_transaction)
+                    bal_txn = await _call_stripe(
+                        account_key,
+                        client.v1.balance_transactions.retrieve_async,
+                        charge.balance_transaction,
+                    )
                     fee_amount = bal_txn.fee / 100.0
                     net_amount = bal_txn.net / 100.0
                 except Exception:
@@ -192,8 +237,9 @@ async def fetch_transactions(
         # ============================
         # 2. Fetch all refunds (paginated)
         # ============================
-        all_refunds = _paginate_stripe_list(
-            client.v1.refunds.list,
+        all_refunds = await _paginate_stripe_list(
+            account_key,
+            client.v1.refunds.list_async,
             {"limit": 100, "created": {"gte": since_timestamp}},
         )
 
@@ -247,7 +293,7 @@ async def verify_connection(access_token: str) -> dict:
     """
     try:
         client = stripe.StripeClient(access_token)
-        account = client.v1.accounts.retrieve("me")
+        account = await client.v1.accounts.retrieve_async("me")
         return {
             "valid": True,
             "account_id": account.id,
@@ -1,13 +1,62 @@
 # app/main.py
 
+import logging
+import queue
+import re
+from contextlib import asynccontextmanager
+from logging.handlers import QueueHandler, QueueListener
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import get_settings
+from app.database import init_db, close_db
 from app.routers import auth, sync, reconcile, matches, health
 
 settings = get_settings()
 
+
+# ============================================
+# Logging
+# ============================================
+
+# Request handlers only enqueue records; a listener thread does the
+# (possibly blocking) write to stderr off the event loop.
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+_log_handler = QueueHandler(_log_queue)
+
+
+def _start_logging() -> QueueListener:
+    """Attach the queue handler to the app's loggers and start the writer."""
+    stream = logging.StreamHandler()
+    stream.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    listener = QueueListener(_log_queue, stream)
+
+    app_logger = logging.getLogger("app")
+    app_logger.setLevel(logging.DEBUG if settings.debug else logging.INFO)
+    app_logger.addHandler(_log_handler)
+    app_logger.propagate = False
+
+    listener.start()
+    return listener
+
+
+def _stop_logging(listener: QueueListener) -> None:
+    """Flush queued records and detach the queue handler."""
+    listener.stop()
+    logging.getLogger("app").removeHandler(_log_handler)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start logging and open the shared database client; undo both on shutdown."""
+    listener = _start_logging()
+    await init_db()
+    yield
+    await close_db()
+    _stop_logging(listener)
+
+
 # ============================================
 # Create FastAPI app
 # ============================================
@@ -18,20 +67,23 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs" if settings.debug else None,
     redoc_url="/redoc" if settings.debug else None,
+    lifespan=lifespan,
 )
 
 # ============================================
 # CORS middleware
 # ============================================
 
+# Compiled once by the middleware: one regex match per request
+ALLOWED_ORIGIN_REGEX = (
+    r"(?:"
+    + re.escape(settings.frontend_url)
+    + r"|http://localhost:3000|https://(?:www\.)?trymesh\.co)"
+)
+
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=[
-        settings.frontend_url,
-        "http://localhost:3000",
-        "https://trymesh.co",
-        "https://www.trymesh.co",
-    ],
+    allow_origin_regex=ALLOWED_ORIGIN_REGEX,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
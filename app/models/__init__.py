@@ -4,6 +4,7 @@ from app.models.transaction import (
     Transaction,
     TransactionCreate,
     TransactionType,
+    TxnCore,
     StripeCharge,
     QuickBooksPayment,
 )
@@ -13,9 +14,11 @@ from app.models.match import (
     DiscrepancyClassification,
     DiscrepancyType,
     DiscrepancySeverity,
+    DiscrepancySeverityAdapter,
     Match,
     MatchDB,
     MatchStatus,
+    MatchStatusAdapter,
     UnmatchedTransaction,
     PossibleMatch,
     MatchResponse,
@@ -36,6 +39,7 @@ __all__ = [
     "Transaction",
     "TransactionCreate",
     "TransactionType",
+    "TxnCore",
     "StripeCharge",
     "QuickBooksPayment",
     # Match
@@ -44,9 +48,11 @@ __all__ = [
     "DiscrepancyClassification",
     "DiscrepancyType",
     "DiscrepancySeverity",
+    "DiscrepancySeverityAdapter",
     "Match",
     "MatchDB",
     "MatchStatus",
+    "MatchStatusAdapter",
     "UnmatchedTransaction",
     "PossibleMatch",
     "MatchResponse",
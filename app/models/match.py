@@ -2,9 +2,9 @@
 
 from datetime import datetime
 from typing import Optional, Literal
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, TypeAdapter
 
-from app.models.transaction import Transaction
+from app.models.transaction import Transaction, TxnCore
 
 
 # ============================================
@@ -44,6 +44,9 @@ DiscrepancyType = Literal[
 
 DiscrepancySeverity = Literal["critical", "warning", "info"]
 
+# Built once at import; validates raw severity strings without a model
+DiscrepancySeverityAdapter = TypeAdapter(DiscrepancySeverity)
+
 class DiscrepancyClassification(BaseModel):
     """Classification of a discrepancy."""
     
@@ -66,6 +69,9 @@ class DiscrepancyClassification(BaseModel):
 
 MatchStatus = Literal["auto_matched", "suggested", "confirmed", "rejected", "resolved"]
 
+# Built once at import; validates raw status strings without a model
+MatchStatusAdapter = TypeAdapter(MatchStatus)
+
 class Match(BaseModel):
     """A matched pair of transactions."""
     
@@ -121,7 +127,7 @@ class MatchDB(BaseModel):
 class PossibleMatch(BaseModel):
     """A potential match candidate."""
     
-    transaction: Transaction
+    transaction: TxnCore
     confidence: ConfidenceBreakdown
     why_not_auto_matched: str
 
@@ -129,7 +135,7 @@ class PossibleMatch(BaseModel):
 class UnmatchedTransaction(BaseModel):
     """A transaction that couldn't be matched."""
     
-    transaction: Transaction
+    transaction: TxnCore
     possible_matches: list[PossibleMatch] = Field(default_factory=list)
     classification: DiscrepancyClassification
     days_old: int
@@ -1,5 +1,6 @@
 # app/models/transaction.py
 
+from dataclasses import dataclass, field
 from datetime import date, datetime
 from typing import Optional, Literal
 from pydantic import BaseModel, Field
@@ -25,6 +26,27 @@ class Transaction(BaseModel):
         from_attributes = True
 
 
+@dataclass(slots=True)
+class TxnCore:
+    """
+    Transaction as seen by the matching engine.
+
+    A plain slotted dataclass: no validation on construction and cheap
+    attribute access in the pairwise scoring loops. Stored rows are
+    converted in bulk by the reconcile router.
+    """
+
+    external_id: str
+    source: str
+    amount: float
+    transaction_date: date
+    transaction_type: str = "charge"
+    description: Optional[str] = None
+    customer_id: Optional[str] = None
+    customer_name: Optional[str] = None
+    metadata: Optional[dict] = field(default_factory=dict)
+
+
 class TransactionCreate(BaseModel):
     """Transaction data from external source."""
 
@@ -10,16 +10,32 @@ Handles the OAuth flow:
 4. /auth/quickbooks/callback - Handles QuickBooks callback (public - OAuth redirect)
 """
 
+import logging
+
 from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import RedirectResponse
 
+from app.cache import MISS, get_cached, set_cached
 from app.config import get_settings
-from app.database import save_connection, get_connection, delete_connection
+from app.database import (
+    save_connection,
+    get_connections_bulk,
+    delete_connection,
+    connection_cache_key,
+)
 from app.dependencies import get_current_user
 from app.integrations import stripe, quickbooks
 
 settings = get_settings()
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Seconds a connection lookup is served from cache; writes invalidate it
+CONNECTION_CACHE_TTL = 60
+
+# "Not connected" is cached only briefly: it is what clients poll for
+# right after OAuth, so a stale miss must not outlive the connect
+MISSING_CONNECTION_CACHE_TTL = 5
 
 
 # ============================================
@@ -80,8 +96,8 @@ async def stripe_callback(
             url=f"{settings.frontend_url}/signup?stripe=connected"
         )
 
-    except Exception as e:
-        print(f"Stripe callback error: {e}")
+    except Exception:
+        logger.exception("Stripe callback failed")
         return RedirectResponse(
             url=f"{settings.frontend_url}/signup?error=stripe_connection_failed"
         )
@@ -145,8 +161,8 @@ async def quickbooks_callback(
             url=f"{settings.frontend_url}/signup?quickbooks=connected"
         )
 
-    except Exception as e:
-        print(f"QuickBooks callback error: {e}")
+    except Exception:
+        logger.exception("QuickBooks callback failed")
         return RedirectResponse(
             url=f"{settings.frontend_url}/signup?error=quickbooks_connection_failed"
         )
@@ -156,27 +172,56 @@ async def quickbooks_callback(
 # Connection Status
 # ============================================
 
+async def _get_connections_cached(user_id: str, services: list[str]) -> dict[str, dict | None]:
+    """
+    Cache-aside lookup of several connections for status polling.
+
+    Cache misses are fetched together in a single query.
+    """
+    conns = {}
+    misses = []
+    for service in services:
+        conn = get_cached(connection_cache_key(user_id, service))
+        if conn is MISS:
+            misses.append(service)
+        else:
+            conns[service] = conn
+
+    if misses:
+        fetched = await get_connections_bulk(user_id, misses)
+        for service in misses:
+            conns[service] = fetched.get(service)
+            ttl = CONNECTION_CACHE_TTL if conns[service] else MISSING_CONNECTION_CACHE_TTL
+            set_cached(connection_cache_key(user_id, service), conns[service], ttl)
+
+    return conns
+
+
+def _conn_view(conn: dict | None, extra: tuple[str, ...] = ()) -> dict:
+    """Shape a connection row (or None) into its public status fields."""
+    if conn is None:
+        return {"connected": False, "status": None, "connected_at": None, **dict.fromkeys(extra)}
+    return {
+        "connected": True,
+        "status": conn.get("status"),
+        "connected_at": conn.get("connected_at"),
+        **{key: conn.get(key) for key in extra},
+    }
+
+
 @router.get("/status")
 async def connection_status(user_id: str = Depends(get_current_user)):
     """
     Get connection status for the authenticated user.
+
+    Polled repeatedly during signup, so lookups are cached briefly.
     """
-    stripe_conn = await get_connection(user_id, "stripe")
-    qbo_conn = await get_connection(user_id, "quickbooks")
+    conns = await _get_connections_cached(user_id, ["stripe", "quickbooks"])
 
     return {
         "user_id": user_id,
-        "stripe": {
-            "connected": stripe_conn is not None,
-            "status": stripe_conn.get("status") if stripe_conn else None,
-            "connected_at": stripe_conn.get("connected_at") if stripe_conn else None,
-        },
-        "quickbooks": {
-            "connected": qbo_conn is not None,
-            "status": qbo_conn.get("status") if qbo_conn else None,
-            "connected_at": qbo_conn.get("connected_at") if qbo_conn else None,
-            "realm_id": qbo_conn.get("realm_id") if qbo_conn else None,
-        },
+        "stripe": _conn_view(conns["stripe"]),
+        "quickbooks": _conn_view(conns["quickbooks"], ("realm_id",)),
     }
 
 
@@ -6,24 +6,53 @@ Match management routes.
 CRUD operations for matches and resolution handling.
 """
 
+import asyncio
+import hashlib
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, Query
-from pydantic import BaseModel
-from typing import Optional
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ConfigDict, ValidationError
+from typing import AsyncIterator, Optional
+import orjson
 
+from app.cache import MISS, get_cached, invalidate_prefix, set_cached
 from app.database import (
+    decode_cursor,
+    encode_cursor,
+    get_discrepancy_summary,
     get_matches,
+    get_matches_page,
+    stream_matches,
     get_match,
     update_match,
     save_resolution,
+    delete_resolution,
     get_user_resolutions,
 )
 from app.core.ai_assist import get_ai_suggestion, explain_match
 from app.dependencies import get_current_user
-from app.models import ResolutionAction
+from app.integrations import claude
+from app.models import DiscrepancySeverityAdapter, MatchDB, MatchStatusAdapter, ResolutionAction
 
 router = APIRouter()
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Seconds an AI suggestion/explanation is served from cache
+AI_CACHE_TTL = 3600
+
+# Match status each resolution action moves a match to
+_STATUS_MAP = {
+    "mark_as_expected": "resolved",
+    "flag_for_review": "suggested",
+    "create_qbo_entry": "resolved",
+    "ignore_permanently": "resolved",
+    "manual_match": "confirmed",
+    "split_transaction": "resolved",
+    "adjust_amount": "resolved",
+}
+_VALID_ACTIONS = frozenset(_STATUS_MAP)
+
 
 # ============================================
 # Request/Response Models
@@ -35,17 +64,69 @@ class ResolveRequest(BaseModel):
     adjustment_amount: Optional[float] = None
 
 
+class CursorPagination(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    limit: int
+    has_more: bool
+    next_cursor: Optional[str] = None
+
+
+class OffsetPagination(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    total: int
+    limit: int
+    offset: int
+    has_more: bool
+
+
+class MatchOffsetPagination(OffsetPagination):
+    """Offset page that also hands out a cursor for the next page."""
+
+    next_cursor: Optional[str] = None
+
+
 class MatchesResponse(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     success: bool
     matches: list
-    pagination: dict
+    pagination: MatchOffsetPagination | CursorPagination
+
+
+class DiscrepanciesResponse(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    success: bool
+    discrepancies: list
+    summary: dict
+    pagination: OffsetPagination
+
+
+class ResolutionsResponse(BaseModel):
+    success: bool
+    user_id: str
+    resolutions: list
+    count: int
+
+
+def _validate_filters(status: Optional[str], severity: Optional[str]) -> None:
+    """Reject unknown status/severity filters before hitting the database."""
+    try:
+        if status is not None:
+            MatchStatusAdapter.validate_python(status)
+        if severity is not None:
+            DiscrepancySeverityAdapter.validate_python(severity)
+    except ValidationError:
+        raise HTTPException(status_code=400, detail="Invalid status or severity filter")
 
 
 # ============================================
 # Get Matches
 # ============================================
 
-@router.get("")
+@router.get("", response_model=MatchesResponse)
 async def list_matches(
     user_id: str = Depends(get_current_user),
     status: Optional[str] = Query(None, description="Filter by status"),
@@ -53,10 +134,41 @@ async def list_matches(
     severity: Optional[str] = Query(None, description="Filter by severity"),
     limit: int = Query(50, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from pagination.next_cursor"),
 ):
     """
     List matches for the authenticated user with optional filters.
+
+    Pass `pagination.next_cursor` back as `cursor` to fetch the next page
+    by keyset, which stays fast however deep the page is. `offset` is still
+    accepted for existing clients but is ignored when a cursor is given.
+    To read every match as ND-JSON, use /matches/stream.
     """
+    _validate_filters(status, severity)
+
+    if cursor:
+        try:
+            matches, next_cursor = await get_matches_page(
+                user_id=user_id,
+                status=status,
+                has_discrepancy=has_discrepancy,
+                severity=severity,
+                limit=limit,
+                cursor=cursor,
+            )
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+        return {
+            "success": True,
+            "matches": matches,
+            "pagination": {
+                "limit": limit,
+                "has_more": next_cursor is not None,
+                "next_cursor": next_cursor,
+            },
+        }
+
     matches, total = await get_matches(
         user_id=user_id,
         status=status,
@@ -66,6 +178,11 @@ async def list_matches(
         offset=offset,
     )
 
+    has_more = offset + limit < total
+    next_cursor = None
+    if has_more and matches:
+        next_cursor = encode_cursor(matches[-1]["matched_at"], matches[-1]["id"])
+
     return {
         "success": True,
         "matches": matches,
@@ -73,12 +190,49 @@ async def list_matches(
             "total": total,
             "limit": limit,
             "offset": offset,
-            "has_more": offset + limit < total,
+            "has_more": has_more,
+            "next_cursor": next_cursor,
         },
     }
 
 
-@router.get("/discrepancies")
+async def _ndjson_lines(matches: AsyncIterator[dict]) -> AsyncIterator[bytes]:
+    """Encode matches as ND-JSON lines."""
+    async for match in matches:
+        yield orjson.dumps(match) + b"\n"
+
+
+@router.get("/stream")
+async def stream_matches_endpoint(
+    user_id: str = Depends(get_current_user),
+    status: Optional[str] = Query(None, description="Filter by status"),
+    has_discrepancy: Optional[bool] = Query(None, description="Filter by discrepancy"),
+    severity: Optional[str] = Query(None, description="Filter by severity"),
+    cursor: Optional[str] = Query(None, description="Start after this pagination.next_cursor"),
+):
+    """
+    Stream all matches for the authenticated user as ND-JSON.
+
+    One match per line, flushed as each page arrives from the database,
+    so large result sets never have to be held in memory. With `cursor`,
+    the stream resumes after that position.
+    """
+    _validate_filters(status, severity)
+
+    # Reject a bad cursor now; once streaming starts the status is sent
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    return StreamingResponse(
+        _ndjson_lines(stream_matches(user_id, status, has_discrepancy, severity, cursor)),
+        media_type=NDJSON_MEDIA_TYPE,
+    )
+
+
+@router.get("/discrepancies", response_model=DiscrepanciesResponse)
 async def list_discrepancies(
     user_id: str = Depends(get_current_user),
     severity: Optional[str] = Query(None, description="Filter by severity"),
@@ -88,22 +242,20 @@ async def list_discrepancies(
     """
     List matches with discrepancies.
     """
-    matches, total = await get_matches(
-        user_id=user_id,
-        has_discrepancy=True,
-        severity=severity,
-        limit=limit,
-        offset=offset,
+    _validate_filters(None, severity)
+
+    # The page and the summary are independent; fetch them together
+    (matches, total), summary = await asyncio.gather(
+        get_matches(
+            user_id=user_id,
+            has_discrepancy=True,
+            severity=severity,
+            limit=limit,
+            offset=offset,
+        ),
+        get_discrepancy_summary(user_id),
     )
 
-    # Calculate summary
-    all_matches, _ = await get_matches(user_id=user_id, has_discrepancy=True, limit=1000)
-    summary = {"critical": 0, "warning": 0, "info": 0, "total": 0}
-    for m in all_matches:
-        sev = m.get("discrepancy_severity", "info")
-        summary[sev] = summary.get(sev, 0) + 1
-        summary["total"] += 1
-
     return {
         "success": True,
         "discrepancies": matches,
@@ -121,7 +273,7 @@ async def list_discrepancies(
 # Resolution History
 # ============================================
 
-@router.get("/resolutions")
+@router.get("/resolutions", response_model=ResolutionsResponse)
 async def get_resolution_history(
     user_id: str = Depends(get_current_user),
     limit: int = Query(50, ge=1, le=100),
@@ -178,20 +330,10 @@ async def resolve_match(
     Records the user's action and updates match status.
     """
     # Validate action
-    valid_actions = [
-        "mark_as_expected",
-        "flag_for_review",
-        "create_qbo_entry",
-        "ignore_permanently",
-        "manual_match",
-        "split_transaction",
-        "adjust_amount",
-    ]
-
-    if request.action not in valid_actions:
+    if request.action not in _VALID_ACTIONS:
         raise HTTPException(
             status_code=400,
-            detail=f"Invalid action. Must be one of: {', '.join(valid_actions)}"
+            detail=f"Invalid action. Must be one of: {', '.join(_STATUS_MAP)}"
         )
 
     # Get the match
@@ -210,22 +352,34 @@ async def resolve_match(
         "snapshot": match,
     }
 
-    saved_resolution = await save_resolution(resolution)
-
     # Determine new status
-    status_map = {
-        "mark_as_expected": "resolved",
-        "flag_for_review": "suggested",
-        "create_qbo_entry": "resolved",
-        "ignore_permanently": "resolved",
-        "manual_match": "confirmed",
-        "split_transaction": "resolved",
-        "adjust_amount": "resolved",
-    }
-    new_status = status_map.get(request.action, "resolved")
+    new_status = _STATUS_MAP.get(request.action, "resolved")
+
+    # The status change and the resolution are independent writes, so they
+    # run together; if only one of them lands, it is undone
+    updated, saved_resolution = await asyncio.gather(
+        update_match(match_id, user_id, {"status": new_status}),
+        save_resolution(resolution),
+        return_exceptions=True,
+    )
+    update_failed = isinstance(updated, BaseException) or not updated
+    save_failed = isinstance(saved_resolution, BaseException)
+
+    if update_failed and not save_failed and saved_resolution:
+        await delete_resolution(saved_resolution["id"])
+    elif save_failed and not update_failed:
+        await update_match(match_id, user_id, {"status": match["status"]})
+
+    if isinstance(updated, BaseException):
+        raise updated
+    if not updated:
+        raise HTTPException(status_code=404, detail="Match not found")
+    if save_failed:
+        raise saved_resolution
 
-    # Update match status
-    await update_match(match_id, {"status": new_status})
+    # Suggestions draw on resolution history, which just changed
+    invalidate_prefix(f"ai:suggestion:{user_id}:")
+    invalidate_prefix(f"ai:explanation:{user_id}:{match_id}:")
 
     return {
         "success": True,
@@ -235,8 +389,8 @@ async def resolve_match(
             "resolved_at": datetime.now().isoformat(),
         },
         "match": {
-            "id": match_id,
-            "new_status": new_status,
+            "id": updated["id"],
+            "new_status": updated["status"],
         },
     }
 
@@ -245,6 +399,12 @@ async def resolve_match(
 # AI Suggestions
 # ============================================
 
+def _ai_cache_key(kind: str, user_id: str, match_data: dict) -> str:
+    """Cache key for an AI result, tied to the exact match row it was made from."""
+    digest = hashlib.sha256(orjson.dumps(match_data, option=orjson.OPT_SORT_KEYS)).hexdigest()
+    return f"ai:{kind}:{user_id}:{match_data['id']}:{digest}"
+
+
 @router.get("/{match_id}/suggestion")
 async def get_suggestion(
     match_id: str,
@@ -252,17 +412,24 @@ async def get_suggestion(
 ):
     """
     Get AI suggestion for resolving a match.
-    """
-    from app.models import MatchDB
 
+    Results are cached per match row; resolving any match clears them.
+    Fallback suggestions (Claude unavailable) are not cached.
+    """
     match_data = await get_match(match_id, user_id)
     if not match_data:
         raise HTTPException(status_code=404, detail="Match not found")
 
-    # Convert to MatchDB for AI processing
-    match = MatchDB(**match_data)
-
-    suggestion = await get_ai_suggestion(match, user_id)
+    key = _ai_cache_key("suggestion", user_id, match_data)
+    suggestion = get_cached(key)
+    if suggestion is MISS:
+        # Convert to MatchDB for AI processing
+        match = MatchDB(**match_data)
+        suggestion = await get_ai_suggestion(match, user_id)
+        if suggestion is None:
+            suggestion = claude.default_suggestion(match)
+        else:
+            set_cached(key, suggestion, AI_CACHE_TTL)
 
     return {
         "success": True,
@@ -278,15 +445,23 @@ async def get_explanation(
 ):
     """
     Get AI explanation for a match.
-    """
-    from app.models import MatchDB
 
+    Results are cached until the match row changes or is resolved.
+    Fallback explanations (Claude unavailable) are not cached.
+    """
     match_data = await get_match(match_id, user_id)
     if not match_data:
         raise HTTPException(status_code=404, detail="Match not found")
 
-    match = MatchDB(**match_data)
-    explanation = await explain_match(match)
+    key = _ai_cache_key("explanation", user_id, match_data)
+    explanation = get_cached(key)
+    if explanation is MISS:
+        match = MatchDB(**match_data)
+        explanation = await explain_match(match)
+        if explanation is None:
+            explanation = claude.default_explanation(match)
+        else:
+            set_cached(key, explanation, AI_CACHE_TTL)
 
     return {
         "success": True,
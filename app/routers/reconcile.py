@@ -6,25 +6,43 @@ Reconciliation routes.
 The main endpoint that runs the matching engine.
 """
 
-from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, Query
-from pydantic import BaseModel
-from typing import Optional
-
+import asyncio
+import logging
+import time
+from collections import Counter
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, TypeAdapter
+from typing import AsyncIterator, Optional
+import orjson
+
+from app.cache import MISS, get_cached, set_cached
 from app.database import (
+    get_matches,
     get_transactions,
     save_matches,
     save_reconciliation_run,
     get_reconciliation_history,
+    history_cache_key,
+    stream_matches,
 )
 from app.core.matching import reconcile
 from app.core.ai_assist import enhance_matches_with_ai
 from app.dependencies import get_current_user
-from app.models import TransactionCreate
+from app.models import MatchDB, TxnCore
+from app.routers.matches import NDJSON_MEDIA_TYPE
 from app.config import get_settings
 
 settings = get_settings()
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Built once at import; each converts a whole run's rows in one pydantic-core call
+_MATCH_ROWS = TypeAdapter(list[MatchDB])
+_TRANSACTIONS = TypeAdapter(list[TxnCore])
+
+# Seconds a history page is served from cache; new runs invalidate it
+HISTORY_CACHE_TTL = 30
 
 
 class ReconcileRequest(BaseModel):
@@ -42,25 +60,73 @@ class ReconcileResponse(BaseModel):
     duration_ms: int
 
 
+class ReconcileResultsResponse(BaseModel):
+    user_id: str
+    total_matches: Optional[int]
+    matches: list
+    discrepancies: dict
+
+
+class ReconcileHistoryResponse(BaseModel):
+    user_id: str
+    runs: list
+    count: int
+
+
+def _to_transactions(rows: list[dict], source: str, default_type: str) -> list[TxnCore]:
+    """Convert stored transaction rows to matching-engine records in bulk."""
+    return _TRANSACTIONS.validate_python([
+        {
+            **t,
+            "source": source,
+            "transaction_type": t.get("transaction_type", default_type),
+            "metadata": t.get("metadata", {}),
+        }
+        for t in rows
+    ])
+
+
+async def _persist_results(user_id: str, match_dicts: list[dict], run: dict) -> None:
+    """
+    Write a run's matches, then its run record.
+
+    The run record is only written once the matches are saved, so a run
+    never appears in history without its matches. Runs as a background
+    task after the response is sent.
+    """
+    try:
+        await save_matches(user_id, match_dicts)
+        await save_reconciliation_run(run)
+    except Exception:
+        logger.exception("Failed to persist results for user %s", user_id)
+        # Persistence failure shouldn't fail the reconciliation
+
+
 # ============================================
 # Main Reconciliation Endpoint
 # ============================================
 
 @router.post("/reconcile", response_model=ReconcileResponse)
-async def run_reconciliation(request: ReconcileRequest, user_id: str = Depends(get_current_user)):
+async def run_reconciliation(
+    request: ReconcileRequest,
+    background_tasks: BackgroundTasks,
+    user_id: str = Depends(get_current_user),
+):
     """
     Run reconciliation for the authenticated user.
 
     1. Fetches synced transactions from database
     2. Runs the matching engine
     3. Optionally enhances with AI explanations
-    4. Saves results to database
+    4. Saves results to database once the response is sent
     """
-    start_time = datetime.now()
+    start_ns = time.perf_counter_ns()
 
-    # Get transactions from database
-    stripe_txns = await get_transactions(user_id, "stripe")
-    qbo_txns = await get_transactions(user_id, "quickbooks")
+    # Get transactions from database; the two sources are independent
+    stripe_txns, qbo_txns = await asyncio.gather(
+        get_transactions(user_id, "stripe"),
+        get_transactions(user_id, "quickbooks"),
+    )
 
     if not stripe_txns and not qbo_txns:
         raise HTTPException(
@@ -68,36 +134,9 @@ async def run_reconciliation(request: ReconcileRequest, user_id: str = Depends(g
             detail="No transactions found. Please sync Stripe and QuickBooks first."
         )
 
-    # Convert to TransactionCreate objects
-    stripe_transactions = [
-        TransactionCreate(
-            external_id=t["external_id"],
-            source="stripe",
-            transaction_type=t.get("transaction_type", "charge"),
-            amount=float(t["amount"]),
-            transaction_date=t["transaction_date"],
-            description=t.get("description"),
-            customer_id=t.get("customer_id"),
-            customer_name=t.get("customer_name"),
-            metadata=t.get("metadata", {}),
-        )
-        for t in stripe_txns
-    ]
-
-    qbo_transactions = [
-        TransactionCreate(
-            external_id=t["external_id"],
-            source="quickbooks",
-            transaction_type=t.get("transaction_type", "payment"),
-            amount=float(t["amount"]),
-            transaction_date=t["transaction_date"],
-            description=t.get("description"),
-            customer_id=t.get("customer_id"),
-            customer_name=t.get("customer_name"),
-            metadata=t.get("metadata", {}),
-        )
-        for t in qbo_txns
-    ]
+    # Convert to matching-engine records
+    stripe_transactions = _to_transactions(stripe_txns, "stripe", "charge")
+    qbo_transactions = _to_transactions(qbo_txns, "quickbooks", "payment")
 
     # Run matching engine
     result = reconcile(stripe_transactions, qbo_transactions, user_id)
@@ -109,46 +148,43 @@ async def run_reconciliation(request: ReconcileRequest, user_id: str = Depends(g
                 result.matched,
                 user_id,
             )
-        except Exception as e:
-            print(f"AI enhancement failed: {e}")
+        except Exception:
+            logger.exception("AI enhancement failed")
             # Continue without AI - not a critical failure
 
-    # Persist results if requested
+    # Persist results if requested; the response only needs the counts
     if request.persist:
-        try:
-            # Save matches
-            match_dicts = [m.model_dump() for m in result.matched]
-            await save_matches(user_id, match_dicts)
-
-            # Save reconciliation run
-            run = {
-                "user_id": user_id,
-                "period_start": result.period_start.isoformat() if result.period_start else None,
-                "period_end": result.period_end.isoformat() if result.period_end else None,
-                "total_stripe_transactions": result.summary.total_stripe_transactions,
-                "total_qbo_transactions": result.summary.total_qbo_transactions,
-                "total_stripe_amount": result.summary.total_stripe_amount,
-                "total_qbo_amount": result.summary.total_qbo_amount,
-                "net_difference": result.summary.net_difference,
-                "total_matched": len(result.matched),
-                "auto_matched": len([m for m in result.matched if m.status == "auto_matched"]),
-                "suggested_matched": len([m for m in result.matched if m.status == "suggested"]),
-                "match_rate": result.summary.match_rate,
-                "auto_match_rate": result.summary.auto_match_rate,
-                "critical_discrepancies": len(result.discrepancies["critical"]),
-                "warning_discrepancies": len(result.discrepancies["warnings"]),
-                "info_discrepancies": len(result.discrepancies["info"]),
-                "unmatched_stripe": len(result.unmatched_stripe),
-                "unmatched_qbo": len(result.unmatched_qbo),
-                "triggered_by": "manual",
-                "duration_ms": result.duration_ms,
-            }
-            await save_reconciliation_run(run)
-        except Exception as e:
-            print(f"Failed to persist results: {e}")
-            # Continue - persistence failure shouldn't fail the whole request
-
-    duration_ms = int((datetime.now() - start_time).total_seconds() * 1000)
+        # Match rows
+        match_dicts = _MATCH_ROWS.dump_python(result.matched, mode="json")
+
+        # Reconciliation run record
+        status_counts = Counter(m.status for m in result.matched)
+        run = {
+            "user_id": user_id,
+            "period_start": result.period_start.isoformat() if result.period_start else None,
+            "period_end": result.period_end.isoformat() if result.period_end else None,
+            "total_stripe_transactions": result.summary.total_stripe_transactions,
+            "total_qbo_transactions": result.summary.total_qbo_transactions,
+            "total_stripe_amount": result.summary.total_stripe_amount,
+            "total_qbo_amount": result.summary.total_qbo_amount,
+            "net_difference": result.summary.net_difference,
+            "total_matched": len(result.matched),
+            "auto_matched": status_counts["auto_matched"],
+            "suggested_matched": status_counts["suggested"],
+            "match_rate": result.summary.match_rate,
+            "auto_match_rate": result.summary.auto_match_rate,
+            "critical_discrepancies": len(result.discrepancies["critical"]),
+            "warning_discrepancies": len(result.discrepancies["warnings"]),
+            "info_discrepancies": len(result.discrepancies["info"]),
+            "unmatched_stripe": len(result.unmatched_stripe),
+            "unmatched_qbo": len(result.unmatched_qbo),
+            "triggered_by": "manual",
+            "duration_ms": result.duration_ms,
+        }
+
+        background_tasks.add_task(_persist_results, user_id, match_dicts, run)
+
+    duration_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
 
     return ReconcileResponse(
         success=True,
@@ -169,12 +205,36 @@ async def run_reconciliation(request: ReconcileRequest, user_id: str = Depends(g
 # Get Reconciliation Results
 # ============================================
 
-@router.get("/reconcile/results")
-async def get_reconciliation_results(user_id: str = Depends(get_current_user)):
+async def _stream_results(user_id: str) -> AsyncIterator[bytes]:
+    """Yield every match as an ND-JSON line, then a line of totals."""
+    total = 0
+    discrepancies = {"critical": 0, "warnings": 0, "info": 0}
+
+    async for match in stream_matches(user_id):
+        total += 1
+        if match.get("has_discrepancy"):
+            severity = match.get("discrepancy_severity", "info")
+            if severity == "critical":
+                discrepancies["critical"] += 1
+            elif severity == "warning":
+                discrepancies["warnings"] += 1
+            else:
+                discrepancies["info"] += 1
+        yield orjson.dumps(match) + b"\n"
+
+    yield orjson.dumps({"summary": {"total_matches": total, "discrepancies": discrepancies}}) + b"\n"
+
+
+@router.get("/reconcile/results", response_model=ReconcileResultsResponse)
+async def get_reconciliation_results(request: Request, user_id: str = Depends(get_current_user)):
     """
     Get the latest reconciliation results for the authenticated user.
+
+    With `Accept: application/x-ndjson`, all matches are streamed one per
+    line as they are read, followed by a summary line with the totals.
     """
-    from app.database import get_matches
+    if NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+        return StreamingResponse(_stream_results(user_id), media_type=NDJSON_MEDIA_TYPE)
 
     matches, total = await get_matches(user_id, limit=100)
 
@@ -212,7 +272,7 @@ async def get_reconciliation_results(user_id: str = Depends(get_current_user)):
 # Reconciliation History (for trend chart)
 # ============================================
 
-@router.get("/reconcile/history")
+@router.get("/reconcile/history", response_model=ReconcileHistoryResponse)
 async def get_reconciliation_history_endpoint(
     user_id: str = Depends(get_current_user),
     limit: int = Query(30, ge=1, le=90),
@@ -221,8 +281,13 @@ async def get_reconciliation_history_endpoint(
     Get reconciliation run history for the authenticated user.
 
     Returns historical runs for charting reconciliation trends.
+    Reloaded on every dashboard visit, so pages are cached briefly.
     """
-    runs = await get_reconciliation_history(user_id, limit)
+    key = history_cache_key(user_id, limit)
+    runs = get_cached(key)
+    if runs is MISS:
+        runs = await get_reconciliation_history(user_id, limit)
+        set_cached(key, runs, HISTORY_CACHE_TTL)
 
     return {
         "user_id": user_id,
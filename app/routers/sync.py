@@ -4,15 +4,39 @@
 Sync routes for fetching transactions from Stripe and QuickBooks.
 """
 
-from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
+import asyncio
+import math
+from collections import Counter
 
-from app.database import get_connection, save_transactions, get_transactions
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel
+from typing import Optional
+
+from app.cache import MISS, get_cached, set_cached
+from app.database import (
+    count_transactions,
+    get_connection,
+    get_connections_bulk,
+    get_transactions_page,
+    save_connection,
+    save_transactions,
+    transaction_count_prefix,
+)
 from app.dependencies import get_current_user
 from app.integrations import stripe, quickbooks
+from app.models import TransactionCreate
 
 router = APIRouter()
 
+# Seconds a transaction count is served from cache; syncs invalidate it
+TRANSACTION_COUNT_CACHE_TTL = 60
+
+# Error detail for a sync attempted before the service is connected
+NOT_CONNECTED = {
+    "stripe": "Stripe not connected. Please connect Stripe first.",
+    "quickbooks": "QuickBooks not connected. Please connect QuickBooks first.",
+}
+
 
 class SyncRequest(BaseModel):
     days: int = 30
@@ -26,6 +50,28 @@ class SyncResponse(BaseModel):
     breakdown: dict = None
 
 
+class SyncAllResponse(BaseModel):
+    user_id: str
+    stripe: dict
+    quickbooks: dict
+
+
+class TransactionsResponse(BaseModel):
+    user_id: str
+    source: Optional[str]
+    customer_id: Optional[str]
+    count: int
+    transactions: list
+    next_cursor: Optional[str]
+
+
+class TransactionCountResponse(BaseModel):
+    user_id: str
+    source: Optional[str]
+    customer_id: Optional[str]
+    total: int
+
+
 # ============================================
 # Stripe Sync
 # ============================================
@@ -40,41 +86,25 @@ async def sync_stripe(request: SyncRequest, user_id: str = Depends(get_current_u
     # Get connection
     connection = await get_connection(user_id, "stripe")
     if not connection:
-        raise HTTPException(
-            status_code=404,
-            detail="Stripe not connected. Please connect Stripe first."
-        )
+        raise HTTPException(status_code=404, detail=NOT_CONNECTED["stripe"])
+
+    return await _sync_stripe(user_id, connection, request.days)
+
 
+async def _sync_stripe(user_id: str, connection: dict, days: int) -> SyncResponse:
+    """Fetch and save Stripe transactions over an existing connection."""
     try:
         # Fetch transactions from Stripe
         transactions = await stripe.fetch_transactions(
             access_token=connection["access_token"],
-            days=request.days,
+            days=days,
         )
 
-        # Convert to dict format for database
-        txn_dicts = [
-            {
-                "external_id": t.external_id,
-                "source": t.source,
-                "transaction_type": t.transaction_type,
-                "amount": t.amount,
-                "transaction_date": t.transaction_date.isoformat(),
-                "description": t.description,
-                "customer_id": t.customer_id,
-                "customer_name": t.customer_name,
-                "metadata": t.metadata,
-            }
-            for t in transactions
-        ]
-
         # Save to database
-        saved_count = await save_transactions(user_id, txn_dicts)
+        saved_count = await save_transactions(user_id, transactions)
 
         # Build breakdown by type
-        breakdown = {}
-        for t in transactions:
-            breakdown[t.transaction_type] = breakdown.get(t.transaction_type, 0) + 1
+        breakdown = dict(Counter(t.transaction_type for t in transactions))
 
         return SyncResponse(
             success=True,
@@ -95,6 +125,43 @@ async def sync_stripe(request: SyncRequest, user_id: str = Depends(get_current_u
 # QuickBooks Sync
 # ============================================
 
+async def _refresh_and_save(user_id: str, connection: dict) -> dict:
+    """
+    Refresh a QuickBooks connection's tokens and persist them.
+
+    Returns the connection with the new tokens. Raises QBOTokenExpired if
+    the refresh itself is rejected, since the user must then reconnect.
+    """
+    try:
+        new_tokens = await quickbooks.refresh_access_token(connection["refresh_token"])
+    except Exception as e:
+        raise quickbooks.QBOTokenExpired("QuickBooks token refresh failed") from e
+
+    await save_connection(
+        user_id=user_id,
+        service="quickbooks",
+        access_token=new_tokens["access_token"],
+        refresh_token=new_tokens["refresh_token"],
+        realm_id=connection["realm_id"],
+    )
+    return {**connection, **new_tokens}
+
+
+async def _fetch_quickbooks(user_id: str, connection: dict, days: int) -> list[TransactionCreate]:
+    """Fetch QuickBooks transactions, refreshing an expired token at most once."""
+    for attempt in range(2):
+        try:
+            return await quickbooks.fetch_transactions(
+                access_token=connection["access_token"],
+                realm_id=connection["realm_id"],
+                days=days,
+            )
+        except quickbooks.QBOTokenExpired:
+            if attempt:
+                raise
+            connection = await _refresh_and_save(user_id, connection)
+
+
 @router.post("/quickbooks", response_model=SyncResponse)
 async def sync_quickbooks(request: SyncRequest, user_id: str = Depends(get_current_user)):
     """
@@ -105,42 +172,22 @@ async def sync_quickbooks(request: SyncRequest, user_id: str = Depends(get_curre
     # Get connection
     connection = await get_connection(user_id, "quickbooks")
     if not connection:
-        raise HTTPException(
-            status_code=404,
-            detail="QuickBooks not connected. Please connect QuickBooks first."
-        )
+        raise HTTPException(status_code=404, detail=NOT_CONNECTED["quickbooks"])
+
+    return await _sync_quickbooks(user_id, connection, request.days)
 
+
+async def _sync_quickbooks(user_id: str, connection: dict, days: int) -> SyncResponse:
+    """Fetch and save QuickBooks transactions over an existing connection."""
     try:
         # Fetch transactions from QuickBooks
-        transactions = await quickbooks.fetch_transactions(
-            access_token=connection["access_token"],
-            realm_id=connection["realm_id"],
-            days=request.days,
-        )
-
-        # Convert to dict format for database
-        txn_dicts = [
-            {
-                "external_id": t.external_id,
-                "source": t.source,
-                "transaction_type": t.transaction_type,
-                "amount": t.amount,
-                "transaction_date": t.transaction_date.isoformat(),
-                "description": t.description,
-                "customer_id": t.customer_id,
-                "customer_name": t.customer_name,
-                "metadata": t.metadata,
-            }
-            for t in transactions
-        ]
+        transactions = await _fetch_quickbooks(user_id, connection, days)
 
         # Save to database
-        saved_count = await save_transactions(user_id, txn_dicts)
+        saved_count = await save_transactions(user_id, transactions)
 
         # Build breakdown by type
-        breakdown = {}
-        for t in transactions:
-            breakdown[t.transaction_type] = breakdown.get(t.transaction_type, 0) + 1
+        breakdown = dict(Counter(t.transaction_type for t in transactions))
 
         return SyncResponse(
             success=True,
@@ -150,31 +197,24 @@ async def sync_quickbooks(request: SyncRequest, user_id: str = Depends(get_curre
             breakdown=breakdown,
         )
 
-    except Exception as e:
-        # Check if token expired
-        if "expired" in str(e).lower():
-            # Try to refresh token
-            try:
-                new_tokens = await quickbooks.refresh_access_token(
-                    connection["refresh_token"]
-                )
-                # Update connection with new tokens
-                from app.database import save_connection
-                await save_connection(
-                    user_id=user_id,
-                    service="quickbooks",
-                    access_token=new_tokens["access_token"],
-                    refresh_token=new_tokens["refresh_token"],
-                    realm_id=connection["realm_id"],
-                )
-                # Retry the sync
-                return await sync_quickbooks(request, user_id)
-            except Exception:
-                raise HTTPException(
-                    status_code=401,
-                    detail="QuickBooks token expired. Please reconnect."
-                )
+    except quickbooks.QBOTokenExpired:
+        raise HTTPException(
+            status_code=401,
+            detail="QuickBooks token expired. Please reconnect."
+        )
 
+    except quickbooks.QBOThrottled as e:
+        raise HTTPException(
+            status_code=429,
+            detail="QuickBooks rate limit reached. Please try again later.",
+            headers={
+                "Retry-After": str(max(1, math.ceil(e.retry_after or 0))),
+                "RateLimit-Limit": str(quickbooks.QBO_REQUESTS_PER_MINUTE),
+                "RateLimit-Remaining": "0",
+            },
+        )
+
+    except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Failed to sync QuickBooks: {str(e)}"
@@ -185,62 +225,72 @@ async def sync_quickbooks(request: SyncRequest, user_id: str = Depends(get_curre
 # Sync Both
 # ============================================
 
-@router.post("/all")
+def _sync_outcome(result: SyncResponse | BaseException) -> dict:
+    """Summarize one service's sync result (or HTTP error) for sync_all."""
+    if isinstance(result, HTTPException):
+        return {
+            "success": False,
+            "error": result.detail,
+        }
+    if isinstance(result, BaseException):
+        raise result
+
+    return {
+        "success": True,
+        "transactions": result.transactions_synced,
+    }
+
+
+@router.post("/all", response_model=SyncAllResponse)
 async def sync_all(request: SyncRequest, user_id: str = Depends(get_current_user)):
     """
     Sync transactions from both Stripe and QuickBooks.
+
+    Services that aren't connected are reported as such without syncing.
     """
-    results = {
-        "user_id": user_id,
-        "stripe": None,
-        "quickbooks": None,
-    }
+    syncs = {"stripe": _sync_stripe, "quickbooks": _sync_quickbooks}
 
-    # Sync Stripe
-    try:
-        stripe_result = await sync_stripe(request, user_id)
-        results["stripe"] = {
-            "success": True,
-            "transactions": stripe_result.transactions_synced,
-        }
-    except HTTPException as e:
-        results["stripe"] = {
-            "success": False,
-            "error": e.detail,
-        }
+    # One query for both connections, then sync whichever exist
+    connections = await get_connections_bulk(user_id, list(syncs))
+    connected = [service for service in syncs if connections.get(service)]
 
-    # Sync QuickBooks
-    try:
-        qbo_result = await sync_quickbooks(request, user_id)
-        results["quickbooks"] = {
-            "success": True,
-            "transactions": qbo_result.transactions_synced,
-        }
-    except HTTPException as e:
-        results["quickbooks"] = {
-            "success": False,
-            "error": e.detail,
-        }
+    # The syncs are independent; run them side by side
+    results = await asyncio.gather(
+        *(syncs[service](user_id, connections[service], request.days) for service in connected),
+        return_exceptions=True,
+    )
 
-    return results
+    outcomes = {service: {"success": False, "error": NOT_CONNECTED[service]} for service in syncs}
+    outcomes.update(zip(connected, map(_sync_outcome, results)))
+
+    return {"user_id": user_id, **outcomes}
 
 
 # ============================================
 # Get Synced Transactions
 # ============================================
 
-@router.get("/transactions")
+@router.get("/transactions", response_model=TransactionsResponse)
 async def get_synced_transactions(
     user_id: str = Depends(get_current_user),
     source: str = None,
     customer_id: str = None,
+    limit: int = Query(500, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from next_cursor"),
 ):
     """
-    Get synced transactions for the authenticated user.
+    Get one page of synced transactions for the authenticated user.
 
     Optionally filter by source (stripe or quickbooks) and/or customer_id.
+    Pages are newest first; pass `next_cursor` back as `cursor` for the
+    next one. Use /sync/transactions/count for the total.
     """
-    transactions = await get_transactions(user_id, source, customer_id=customer_id)
+    try:
+        transactions, next_cursor = await get_transactions_page(
+            user_id, source, customer_id=customer_id, limit=limit, cursor=cursor,
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
     return {
         "user_id": user_id,
@@ -248,4 +298,31 @@ async def get_synced_transactions(
         "customer_id": customer_id,
         "count": len(transactions),
         "transactions": transactions,
+        "next_cursor": next_cursor,
+    }
+
+
+@router.get("/transactions/count", response_model=TransactionCountResponse)
+async def get_synced_transaction_count(
+    user_id: str = Depends(get_current_user),
+    source: str = None,
+    customer_id: str = None,
+):
+    """
+    Count synced transactions for the authenticated user.
+
+    Counting scans every matching row, so results are cached briefly;
+    a new sync invalidates them.
+    """
+    key = f"{transaction_count_prefix(user_id)}{source}:{customer_id}"
+    total = get_cached(key)
+    if total is MISS:
+        total = await count_transactions(user_id, source, customer_id=customer_id)
+        set_cached(key, total, TRANSACTION_COUNT_CACHE_TTL)
+
+    return {
+        "user_id": user_id,
+        "source": source,
+        "customer_id": customer_id,
+        "total": total,
     }
@@ -0,0 +1,151 @@
+# tests/test_cache.py
+
+"""
+Tests for the in-process TTL cache.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from app import cache
+from app.cache import MISS, get_cached, invalidate, invalidate_prefix, set_cached
+
+
+class Clock:
+    """A controllable stand-in for time.monotonic."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture(autouse=True)
+def clock(monkeypatch) -> Clock:
+    """An empty store and a clock the test moves by hand."""
+    clock = Clock()
+    monkeypatch.setattr(cache, "time", SimpleNamespace(monotonic=clock))
+    monkeypatch.setattr(cache, "_store", {})
+    return clock
+
+
+# ============================================
+# Lookup and TTL Tests
+# ============================================
+
+class TestGetCached:
+    """get_cached returns live values and MISS for absent or expired keys."""
+
+    def test_absent_key_is_miss(self):
+        assert get_cached("nope") is MISS
+
+    def test_cached_none_is_not_miss(self):
+        """A cached "not connected" (None) is a hit, not a miss."""
+        set_cached("conn", None, ttl=60)
+
+        assert get_cached("conn") is None
+
+    def test_live_until_ttl(self, clock):
+        set_cached("key", "value", ttl=60)
+        clock.now += 59.9
+
+        assert get_cached("key") == "value"
+
+    def test_expires_at_ttl(self, clock):
+        set_cached("key", "value", ttl=60)
+        clock.now += 60
+
+        assert get_cached("key") is MISS
+        assert "key" not in cache._store
+
+    def test_rewrite_resets_ttl(self, clock):
+        set_cached("key", "old", ttl=60)
+        clock.now += 50
+        set_cached("key", "new", ttl=60)
+        clock.now += 50
+
+        assert get_cached("key") == "new"
+
+
+# ============================================
+# Invalidation Tests
+# ============================================
+
+class TestInvalidate:
+    """Writers drop the keys they change."""
+
+    def test_invalidate_keys(self):
+        for key in ("a", "b", "c"):
+            set_cached(key, key, ttl=60)
+
+        invalidate("a", "b", "missing")
+
+        assert [get_cached(key) for key in ("a", "b", "c")] == [MISS, MISS, "c"]
+
+    def test_invalidate_prefix(self):
+        set_cached("ai:explanation:u1:m1:abc", 1, ttl=60)
+        set_cached("ai:explanation:u1:m2:abc", 2, ttl=60)
+        set_cached("ai:explanation:u2:m1:abc", 3, ttl=60)
+
+        invalidate_prefix("ai:explanation:u1:m1:")
+
+        assert get_cached("ai:explanation:u1:m1:abc") is MISS
+        assert get_cached("ai:explanation:u1:m2:abc") == 2
+        assert get_cached("ai:explanation:u2:m1:abc") == 3
+
+
+# ============================================
+# Eviction Tests
+# ============================================
+
+class TestEviction:
+    """A full store evicts expired entries, then the oldest, in one batch."""
+
+    @pytest.fixture(autouse=True)
+    def small(self, monkeypatch):
+        monkeypatch.setattr(cache, "MAX_ENTRIES", 100)
+
+    def fill(self, count: int, ttl: float = 60) -> None:
+        for i in range(count):
+            set_cached(f"k{i}", i, ttl)
+
+    def test_full_store_trims_to_evict_to(self):
+        self.fill(100)
+        set_cached("new", "value", ttl=60)
+
+        assert len(cache._store) == 91
+        assert get_cached("k9") is MISS
+        assert get_cached("k10") == 10
+        assert get_cached("new") == "value"
+
+    def test_evicts_once_per_batch(self, monkeypatch):
+        self.fill(100)
+        sweeps = []
+        evict = cache._evict
+        monkeypatch.setattr(cache, "_evict", lambda: (sweeps.append(1), evict()))
+
+        for i in range(10):
+            set_cached(f"more{i}", i, ttl=60)
+
+        assert len(sweeps) == 1
+        assert len(cache._store) == 100
+
+    def test_expired_entries_go_first(self, clock):
+        self.fill(20, ttl=1)
+        for i in range(20, 100):
+            set_cached(f"k{i}", i, ttl=600)
+        clock.now += 10
+
+        set_cached("new", "value", ttl=60)
+
+        assert len(cache._store) == 81
+        assert get_cached("k20") == 20
+
+    def test_rewriting_a_key_does_not_evict(self):
+        self.fill(100)
+        set_cached("k50", "updated", ttl=60)
+
+        assert len(cache._store) == 100
+        assert get_cached("k0") == 0
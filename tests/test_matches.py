@@ -0,0 +1,126 @@
+# tests/test_matches.py
+
+"""
+Tests for caching of AI suggestions and explanations on match routes.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import cache
+from app.dependencies import get_current_user
+from app.main import app
+from app.routers import matches
+
+
+MATCH_ROW = {
+    "id": "match-1",
+    "user_id": "user-1",
+    "stripe_external_id": "ch_1",
+    "qbo_external_id": "qb_1",
+    "confidence_total": 72,
+    "confidence_level": "medium",
+    "confidence_breakdown": {},
+    "match_reason": "Amount and date match",
+    "status": "suggested",
+    "has_discrepancy": True,
+    "discrepancy_type": "fee_not_recorded",
+    "discrepancy_severity": "warning",
+    "discrepancy_explanation": "Stripe fee not recorded in QuickBooks",
+}
+
+
+class FakeClaude:
+    """Returns queued results in order (None means Claude was unavailable)."""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = 0
+
+    async def __call__(self, *args):
+        self.calls += 1
+        return self.results.pop(0)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """A client for user-1, whose only match is MATCH_ROW, and an empty cache."""
+    async def get_match(match_id, user_id):
+        return MATCH_ROW if (match_id, user_id) == ("match-1", "user-1") else None
+
+    monkeypatch.setattr(matches, "get_match", get_match)
+    monkeypatch.setattr(cache, "_store", {})
+    app.dependency_overrides[get_current_user] = lambda: "user-1"
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+# ============================================
+# Fallback Caching Tests
+# ============================================
+
+class TestFallbacksNotCached:
+    """Only real Claude output is cached; a fallback is retried next time."""
+
+    def test_explanation(self, client, monkeypatch):
+        claude = FakeClaude(None, "The $2.90 gap is the Stripe fee.")
+        monkeypatch.setattr(matches, "explain_match", claude)
+
+        first = client.get("/matches/match-1/explain").json()["explanation"]
+        second = client.get("/matches/match-1/explain").json()["explanation"]
+        third = client.get("/matches/match-1/explain").json()["explanation"]
+
+        assert first == MATCH_ROW["discrepancy_explanation"]
+        assert second == third == "The $2.90 gap is the Stripe fee."
+        assert claude.calls == 2
+
+    def test_suggestion(self, client, monkeypatch):
+        suggestion = {"action": "adjust_amount", "confidence": 0.9, "reasoning": "Fee"}
+        claude = FakeClaude(None, suggestion)
+        monkeypatch.setattr(matches, "get_ai_suggestion", claude)
+
+        first = client.get("/matches/match-1/suggestion").json()["suggestion"]
+        second = client.get("/matches/match-1/suggestion").json()["suggestion"]
+        third = client.get("/matches/match-1/suggestion").json()["suggestion"]
+
+        assert first["action"] == "adjust_amount"
+        assert first != suggestion
+        assert second == third == suggestion
+        assert claude.calls == 2
+
+
+# ============================================
+# Resolve Invalidation Tests
+# ============================================
+
+class TestResolveClearsAiCache:
+    """Resolving a match drops its cached AI results."""
+
+    @pytest.fixture(autouse=True)
+    def writes(self, monkeypatch):
+        async def update_match(match_id, user_id, updates):
+            return {**MATCH_ROW, **updates}
+
+        async def save_resolution(resolution):
+            return {"id": "resolution-1"}
+
+        monkeypatch.setattr(matches, "update_match", update_match)
+        monkeypatch.setattr(matches, "save_resolution", save_resolution)
+
+    def test_resolve_clears_explanation(self, client, monkeypatch):
+        claude = FakeClaude("First explanation.", "Second explanation.")
+        monkeypatch.setattr(matches, "explain_match", claude)
+
+        client.get("/matches/match-1/explain")
+        client.get("/matches/match-1/explain")
+        assert claude.calls == 1
+
+        response = client.post("/matches/match-1/resolve", json={"action": "mark_as_expected"})
+        assert response.status_code == 200
+
+        # get_match still returns the same row, so only the invalidation
+        # can make this miss
+        explanation = client.get("/matches/match-1/explain").json()["explanation"]
+
+        assert explanation == "Second explanation."
+        assert claude.calls == 2
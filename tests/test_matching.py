@@ -7,10 +7,17 @@ Tests for the core matching engine.
 import pytest
 from datetime import date
 
-from app.models import TransactionCreate
-from app.core.matching import reconcile
-from app.core.confidence import calculate_confidence
-from app.core.classification import classify_discrepancy
+from app.models import TxnCore
+from app.core import matching
+from app.core.matching import reconcile, _amount_index, _candidates_between
+from app.core.confidence import (
+    amount_tolerance_for,
+    calculate_confidence,
+    _fuzzy_similarity,
+    _normalize_string,
+    _pair_similarity,
+)
+from app.core.classification import FEE_MATCH_TOLERANCE, classify_discrepancy, expected_net_amount
 
 
 # ============================================
@@ -22,8 +29,8 @@ def make_stripe_txn(
     amount: float,
     txn_date: date,
     customer_name: str = None,
-) -> TransactionCreate:
-    return TransactionCreate(
+) -> TxnCore:
+    return TxnCore(
         external_id=id,
         source="stripe",
         amount=amount,
@@ -38,8 +45,8 @@ def make_qbo_txn(
     amount: float,
     txn_date: date,
     customer_name: str = None,
-) -> TransactionCreate:
-    return TransactionCreate(
+) -> TxnCore:
+    return TxnCore(
         external_id=id,
         source="quickbooks",
         amount=amount,
@@ -49,6 +56,12 @@ def make_qbo_txn(
     )
 
 
+@pytest.fixture(scope="module")
+def charge() -> TxnCore:
+    """A plain $100 Stripe charge, shared read-only across tests."""
+    return make_stripe_txn("ch_1", 100.00, date(2025, 1, 15))
+
+
 # ============================================
 # Confidence Scoring Tests
 # ============================================
@@ -68,22 +81,20 @@ class TestConfidenceScoring:
         assert confidence.amount_score == 40  # Exact match
         assert confidence.date_score == 30    # Same day
     
-    def test_amount_mismatch_lowers_confidence(self):
+    def test_amount_mismatch_lowers_confidence(self, charge):
         """Significant amount difference should lower confidence."""
-        stripe = make_stripe_txn("ch_1", 100.00, date(2025, 1, 15))
         qbo = make_qbo_txn("qbo_1", 80.00, date(2025, 1, 15))
         
-        confidence = calculate_confidence(stripe, qbo)
+        confidence = calculate_confidence(charge, qbo)
         
         assert confidence.level != "high"
         assert confidence.amount_score < 20
     
-    def test_date_tolerance(self):
+    def test_date_tolerance(self, charge):
         """Dates within 3 days should still score well."""
-        stripe = make_stripe_txn("ch_1", 100.00, date(2025, 1, 15))
         qbo = make_qbo_txn("qbo_1", 100.00, date(2025, 1, 17))  # 2 days later
         
-        confidence = calculate_confidence(stripe, qbo)
+        confidence = calculate_confidence(charge, qbo)
         
         assert confidence.date_score >= 20
     
@@ -98,6 +109,30 @@ class TestConfidenceScoring:
         assert "Customer name" in str(confidence.factors) or "customer" in str(confidence.factors).lower()
 
 
+class TestStringCaches:
+    """Cached string helpers return the same results as a fresh computation."""
+    
+    def test_normalize_string(self):
+        """Normalization is unchanged by caching, on first and repeat calls."""
+        for _ in range(2):
+            assert _normalize_string("  Acme,  Corp. ") == "acme corp"
+    
+    def test_similarity_is_symmetric_and_shared(self):
+        """(a, b) and (b, a) give the same score from one cache entry."""
+        _pair_similarity.cache_clear()
+        
+        forward = _fuzzy_similarity("acme corporation", "acme corp")
+        backward = _fuzzy_similarity("acme corp", "acme corporation")
+        
+        assert forward == backward
+        assert forward == pytest.approx(_pair_similarity.__wrapped__("acme corp", "acme corporation"))
+        assert _pair_similarity.cache_info().currsize == 1
+        assert _pair_similarity.cache_info().hits == 1
+    
+    def test_empty_strings(self):
+        assert _fuzzy_similarity("", "acme") == 0.0
+
+
 # ============================================
 # Discrepancy Classification Tests
 # ============================================
@@ -105,35 +140,50 @@ class TestConfidenceScoring:
 class TestDiscrepancyClassification:
     """Test the discrepancy classification."""
     
-    def test_missing_in_qbo(self):
+    def test_missing_in_qbo(self, charge):
         """Missing QBO transaction should be critical."""
-        stripe = make_stripe_txn("ch_1", 100.00, date(2025, 1, 15))
-        
-        classification = classify_discrepancy(stripe, None)
+        classification = classify_discrepancy(charge, None)
         
         assert classification.type == "missing_in_qbo"
         assert classification.severity == "critical"
     
-    def test_fee_detection(self):
-        """Should detect Stripe fee pattern."""
-        stripe = make_stripe_txn("ch_1", 100.00, date(2025, 1, 15))
+    @pytest.mark.parametrize("qbo_amount, qbo_date, expected", [
         # Net after 2.9% + $0.30 fee = 100 - 3.20 = 96.80
-        qbo = make_qbo_txn("qbo_1", 96.80, date(2025, 1, 15))
+        (96.80, date(2025, 1, 15), {"type": "fee_not_recorded", "auto_resolvable": True}),
+        # Same amount, 7 days later
+        (100.00, date(2025, 1, 22), {"type": "timing_difference", "severity": "info"}),
+    ], ids=["fee_detection", "timing_difference"])
+    def test_classifies_matched_pair(self, charge, qbo_amount, qbo_date, expected):
+        """Should detect fee patterns and timing differences."""
+        qbo = make_qbo_txn("qbo_1", qbo_amount, qbo_date)
         
-        classification = classify_discrepancy(stripe, qbo)
+        classification = classify_discrepancy(charge, qbo)
         
-        assert classification.type == "fee_not_recorded"
-        assert classification.auto_resolvable == True
+        assert {field: getattr(classification, field) for field in expected} == expected
+
+
+class TestFeeFormula:
+    """The shared Stripe fee formula and its matching tolerance."""
     
-    def test_timing_difference(self):
-        """Same amount with date gap should be timing difference."""
-        stripe = make_stripe_txn("ch_1", 100.00, date(2025, 1, 15))
-        qbo = make_qbo_txn("qbo_1", 100.00, date(2025, 1, 22))  # 7 days later
-        
-        classification = classify_discrepancy(stripe, qbo)
+    @pytest.mark.parametrize("gross, net", [
+        (100.00, 96.80),      # 100 - (2.90 + 0.30)
+        (1000.00, 970.70),    # 1000 - (29.00 + 0.30)
+    ])
+    def test_expected_net_amount(self, gross, net):
+        assert expected_net_amount(gross) == pytest.approx(net)
+    
+    @pytest.mark.parametrize("side", [-1, 1], ids=["below", "above"])
+    @pytest.mark.parametrize("offset, expected_type", [
+        (-0.01, "fee_not_recorded"),   # just inside the tolerance
+        (0.01, "amount_mismatch"),     # just outside it
+    ], ids=["inside", "outside"])
+    def test_fee_tolerance_boundary(self, charge, side, offset, expected_type):
+        """The fee pattern holds within FEE_MATCH_TOLERANCE of the gross around the expected net."""
+        bound = charge.amount * FEE_MATCH_TOLERANCE
+        qbo_amount = round(expected_net_amount(charge.amount) + side * (bound + offset), 2)
+        qbo = make_qbo_txn("qbo_1", qbo_amount, date(2025, 1, 15))
         
-        assert classification.type == "timing_difference"
-        assert classification.severity == "info"
+        assert classify_discrepancy(charge, qbo).type == expected_type
 
 
 # ============================================
@@ -188,6 +238,119 @@ class TestReconciliation:
         assert result.summary.match_rate == 0
 
 
+# ============================================
+# Amount Window Tests
+# ============================================
+
+def make_pair_txn(id: str, source: str, amount: float, transaction_type: str) -> TxnCore:
+    """Same day, customer and description, so only the amount decides the match."""
+    return TxnCore(
+        external_id=id,
+        source=source,
+        amount=amount,
+        transaction_date=date(2025, 1, 15),
+        transaction_type=transaction_type,
+        description="Invoice 1001",
+        customer_id="cus_1",
+    )
+
+
+def outcome(result) -> tuple:
+    """The parts of a reconciliation result the amount windows can affect."""
+    matched = [
+        (m.stripe_external_id, m.qbo_external_id, m.status, m.confidence_total)
+        for m in result.matched
+    ]
+    unmatched = [
+        (u.transaction.external_id, [(p.transaction.external_id, p.confidence.total) for p in u.possible_matches])
+        for u in result.unmatched_stripe + result.unmatched_qbo
+    ]
+    return matched, unmatched
+
+
+def reconcile_unwindowed(monkeypatch, stripe_txns, qbo_txns):
+    """Reconcile with the amount windows disabled, scanning every candidate."""
+    with monkeypatch.context() as patch:
+        patch.setattr(matching, "HIGH_MATCH_TOLERANCE", None)
+        patch.setattr(matching, "_candidates_between", lambda transactions, index, low, high: transactions)
+        return reconcile(stripe_txns, qbo_txns, "test_user")
+
+
+class TestAmountWindow:
+    """The amount windows only skip pairs that could never have matched."""
+    
+    def test_tolerance_for_thresholds(self):
+        """High confidence needs the amount within 1%; medium can match on anything."""
+        assert amount_tolerance_for(85) == 1
+        assert amount_tolerance_for(60) is None
+    
+    def test_candidates_between(self):
+        """Window bounds are inclusive, on absolute amounts, in original order."""
+        txns = [
+            make_qbo_txn("q_1", 105.00, date(2025, 1, 15)),
+            make_qbo_txn("q_2", -100.00, date(2025, 1, 15)),
+            make_qbo_txn("q_3", 99.00, date(2025, 1, 15)),
+            make_qbo_txn("q_4", 101.00, date(2025, 1, 15)),
+        ]
+        
+        window = _candidates_between(txns, _amount_index(txns), 99.00, 101.00)
+        
+        assert [t.external_id for t in window] == ["q_2", "q_3", "q_4"]
+    
+    def test_charge_at_one_percent_edge(self, monkeypatch):
+        """Just inside 1% can auto-match; just outside can only be suggested."""
+        stripe_txns = [
+            make_pair_txn("ch_1", "stripe", 1000.00, "charge"),
+            make_pair_txn("ch_2", "stripe", 2000.00, "charge"),
+        ]
+        qbo_txns = [
+            make_pair_txn("qbo_in", "quickbooks", 1009.99, "payment"),
+            make_pair_txn("qbo_out", "quickbooks", 2020.02, "payment"),
+        ]
+        
+        result = reconcile(stripe_txns, qbo_txns, "test_user")
+        matched, _ = outcome(result)
+        
+        assert ("ch_1", "qbo_in", "auto_matched", 90) in matched
+        assert ("ch_2", "qbo_out", "suggested", 80) in matched
+        assert outcome(result) == outcome(reconcile_unwindowed(monkeypatch, stripe_txns, qbo_txns))
+    
+    def test_refund_window(self, monkeypatch):
+        """Refunds are windowed on absolute amounts against QB credits."""
+        stripe_txns = [make_pair_txn("re_1", "stripe", -250.00, "refund")]
+        qbo_txns = [
+            make_pair_txn("cm_far", "quickbooks", -290.00, "credit_memo"),
+            make_pair_txn("cm_1", "quickbooks", -250.00, "credit_memo"),
+        ]
+        
+        result = reconcile(stripe_txns, qbo_txns, "test_user")
+        
+        assert [(m.stripe_external_id, m.qbo_external_id, m.status) for m in result.matched] == [
+            ("re_1", "cm_1", "auto_matched"),
+        ]
+        assert outcome(result) == outcome(reconcile_unwindowed(monkeypatch, stripe_txns, qbo_txns))
+    
+    def test_fee_netted_deposit(self, monkeypatch):
+        """The fee pass finds the net deposit and leaves the rest as possible matches."""
+        stripe_txns = [
+            make_stripe_txn("ch_1", 1000.00, date(2025, 1, 15)),
+            make_stripe_txn("ch_2", 500.00, date(2025, 1, 15)),
+        ]
+        qbo_txns = [
+            make_qbo_txn("qbo_decoy", 960.00, date(2025, 1, 15)),
+            # Net after fees is 970.70; within the 0.5% ($5.00) tolerance
+            make_qbo_txn("qbo_net", 973.10, date(2025, 1, 15)),
+        ]
+        
+        result = reconcile(stripe_txns, qbo_txns, "test_user")
+        matched, unmatched = outcome(result)
+        
+        assert [(m[0], m[1]) for m in matched] == [("ch_1", "qbo_net")]
+        assert result.matched[0].discrepancy_type == "fee_not_recorded"
+        assert unmatched[0][0] == "ch_2" and unmatched[0][1]
+        assert outcome(result) == outcome(reconcile_unwindowed(monkeypatch, stripe_txns, qbo_txns))
+
+
 # ============================================
 # Run Tests
 # ============================================
@@ -0,0 +1,79 @@
+# tests/test_pagination.py
+
+"""
+Tests for keyset pagination cursors.
+"""
+
+import base64
+import uuid
+
+import pytest
+
+from app.database import decode_cursor, encode_cursor
+
+
+ROW_ID = "3f2b8c1e-9a4d-4e6f-8b2a-1c5d7e9f0a13"
+
+
+def raw_cursor(text: str) -> str:
+    """Encode arbitrary text the way encode_cursor does, without validation."""
+    return base64.urlsafe_b64encode(text.encode()).decode()
+
+
+# ============================================
+# Cursor Round-Trip Tests
+# ============================================
+
+class TestCursorRoundTrip:
+    """Cursors made by encode_cursor decode back to their position."""
+
+    @pytest.mark.parametrize("sort_value", [
+        "2025-01-15",                          # transactions.transaction_date
+        "2025-01-15T10:30:00.123456+00:00",    # matches.matched_at
+        "2025-01-15T10:30:00+00:00",
+    ])
+    def test_round_trip(self, sort_value):
+        """ISO dates and timestamps come back unchanged."""
+        assert decode_cursor(encode_cursor(sort_value, ROW_ID)) == (sort_value, ROW_ID)
+
+    def test_normalizes_values(self):
+        """Equivalent spellings are re-emitted in one canonical form."""
+        cursor = encode_cursor("2025-01-15T10:30:00Z", ROW_ID.upper())
+
+        assert decode_cursor(cursor) == ("2025-01-15T10:30:00+00:00", ROW_ID)
+
+    def test_random_ids(self):
+        """Any UUID survives the round trip."""
+        row_id = str(uuid.uuid4())
+
+        assert decode_cursor(encode_cursor("2025-01-15", row_id))[1] == row_id
+
+    @pytest.mark.parametrize("row_id", [ROW_ID, "184467"], ids=["uuid", "integer"])
+    def test_transaction_cursor(self, row_id):
+        """A transactions cursor (transaction_date, database-assigned id) round-trips."""
+        row = {"transaction_date": "2025-01-15", "id": row_id}
+
+        assert decode_cursor(encode_cursor(row["transaction_date"], row["id"])) == ("2025-01-15", row_id)
+
+
+# ============================================
+# Cursor Rejection Tests
+# ============================================
+
+class TestCursorRejection:
+    """Malformed or hostile cursors raise ValueError before reaching PostgREST."""
+
+    @pytest.mark.parametrize("cursor", [
+        "not base64!",
+        raw_cursor("no separator"),
+        raw_cursor("abc|def"),
+        raw_cursor(f"yesterday|{ROW_ID}"),
+        raw_cursor("2025-01-15|not-a-uuid"),
+        raw_cursor("2025-01-15|-42"),
+        # Attempts to smuggle extra or-conditions into the filter
+        raw_cursor(f'2025-01-15",id.gt."0|{ROW_ID}'),
+        raw_cursor(f'2025-01-15|{ROW_ID}",status.eq."resolved'),
+    ], ids=["not_base64", "no_separator", "bogus_values", "bad_date", "bad_id", "negative_id", "quoted_date", "quoted_id"])
+    def test_rejects(self, cursor):
+        with pytest.raises(ValueError):
+            decode_cursor(cursor)
@@ -0,0 +1,284 @@
+# tests/test_quickbooks.py
+
+"""
+Tests for QuickBooks error classification, throttling retries and paging.
+"""
+
+import asyncio
+import uuid
+
+import httpx
+import pytest
+
+from app.core import ratelimit
+from app.integrations import quickbooks
+from app.integrations.quickbooks import (
+    QBO_MAX_RETRIES,
+    QBOThrottled,
+    QBOTokenExpired,
+    _qbo_error,
+    _qbo_query,
+)
+
+
+def fault(status_code: int, code: str) -> httpx.Response:
+    """A QBO error response carrying one fault code."""
+    return httpx.Response(
+        status_code,
+        json={"Fault": {"Error": [{"Message": "error", "code": code}], "type": "ValidationFault"}},
+    )
+
+
+@pytest.fixture
+def realm_id() -> str:
+    """A fresh realm, so each test gets its own rate-limit window."""
+    return str(uuid.uuid4())
+
+
+@pytest.fixture
+def sleeps(monkeypatch) -> list[float]:
+    """Record backoff delays instead of sleeping through them."""
+    delays = []
+    real_sleep = asyncio.sleep
+
+    async def fake_sleep(delay):
+        delays.append(delay)
+        await real_sleep(0)
+
+    monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+    return delays
+
+
+async def run_query(realm_id: str, responses: list[httpx.Response], requests: list) -> dict:
+    """
+    Run _qbo_query against canned responses, recording each request.
+
+    The last response repeats once the list runs out.
+    """
+    def handler(request):
+        requests.append(request)
+        return responses[min(len(requests), len(responses)) - 1]
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        return await _qbo_query(client, "token", realm_id, "SELECT * FROM Payment")
+
+
+# ============================================
+# Error Classification Tests
+# ============================================
+
+class TestQboError:
+    """_qbo_error maps status codes and fault codes to exceptions."""
+
+    def test_401_is_token_expired(self):
+        assert isinstance(_qbo_error(httpx.Response(401, text="Unauthorized")), QBOTokenExpired)
+
+    def test_auth_fault_is_token_expired(self):
+        """QBO can report a dead token as fault 3200 without a 401."""
+        assert isinstance(_qbo_error(fault(400, "3200")), QBOTokenExpired)
+
+    def test_throttle_fault_is_throttled(self):
+        error = _qbo_error(fault(400, "3001"))
+
+        assert isinstance(error, QBOThrottled)
+        assert error.retry_after is None
+
+    def test_429_reads_retry_after(self):
+        error = _qbo_error(httpx.Response(429, headers={"Retry-After": "7"}))
+
+        assert isinstance(error, QBOThrottled)
+        assert error.retry_after == 7.0
+
+    def test_429_ignores_unparseable_retry_after(self):
+        error = _qbo_error(httpx.Response(429, headers={"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}))
+
+        assert isinstance(error, QBOThrottled)
+        assert error.retry_after is None
+
+    @pytest.mark.parametrize("response", [
+        fault(400, "4000"),
+        httpx.Response(500, text="<html>Internal Server Error</html>"),
+        httpx.Response(400, json={"Fault": {"Error": []}}),
+    ], ids=["other_fault", "not_json", "no_errors"])
+    def test_other_errors_are_generic(self, response):
+        error = _qbo_error(response)
+
+        assert not isinstance(error, (QBOTokenExpired, QBOThrottled))
+        assert "QuickBooks API error" in str(error)
+
+
+# ============================================
+# Retry Tests
+# ============================================
+
+class TestQboQuery:
+    """_qbo_query retries throttled requests and gives up after QBO_MAX_RETRIES."""
+
+    @pytest.mark.asyncio
+    async def test_returns_query_response(self, realm_id, sleeps):
+        requests = []
+        data = await run_query(realm_id, [
+            httpx.Response(200, json={"QueryResponse": {"Payment": [{"Id": "1"}]}}),
+        ], requests)
+
+        assert data == {"Payment": [{"Id": "1"}]}
+        assert len(requests) == 1
+        assert sleeps == []
+
+    @pytest.mark.asyncio
+    async def test_token_expired_is_not_retried(self, realm_id, sleeps):
+        requests = []
+        with pytest.raises(QBOTokenExpired):
+            await run_query(realm_id, [httpx.Response(401)], requests)
+
+        assert len(requests) == 1
+
+    @pytest.mark.asyncio
+    async def test_retries_until_success(self, realm_id, sleeps):
+        requests = []
+        data = await run_query(realm_id, [
+            httpx.Response(429, headers={"Retry-After": "0"}),
+            fault(400, "3001"),
+            httpx.Response(200, json={"QueryResponse": {}}),
+        ], requests)
+
+        assert data == {}
+        assert len(requests) == 3
+        assert len(sleeps) == 2
+
+    @pytest.mark.asyncio
+    async def test_retry_after_is_capped_by_backoff(self, realm_id, sleeps):
+        """A huge Retry-After waits only as long as the attempt's backoff."""
+        await run_query(realm_id, [
+            httpx.Response(429, headers={"Retry-After": "3600"}),
+            httpx.Response(200, json={"QueryResponse": {}}),
+        ], [])
+
+        assert 1 <= sleeps[0] < 2
+
+    @pytest.mark.asyncio
+    async def test_gives_up_after_max_retries(self, realm_id, sleeps):
+        requests = []
+        with pytest.raises(QBOThrottled) as caught:
+            await run_query(realm_id, [httpx.Response(429, headers={"Retry-After": "9"})], requests)
+
+        assert len(requests) == QBO_MAX_RETRIES + 1
+        assert len(sleeps) == QBO_MAX_RETRIES
+        assert caught.value.retry_after == 9.0
+
+    @pytest.mark.asyncio
+    async def test_final_retry_after_falls_back_to_limiter(self, realm_id, sleeps, monkeypatch):
+        """Without a Retry-After hint, the limiter's own wait is reported."""
+        calls = []
+
+        def fake_retry_after(key, limit, period):
+            calls.append(key)
+            return 12.5
+
+        monkeypatch.setattr(ratelimit, "retry_after", fake_retry_after)
+
+        with pytest.raises(QBOThrottled) as caught:
+            await run_query(realm_id, [fault(400, "3001")], [])
+
+        assert caught.value.retry_after == 12.5
+        assert calls == [quickbooks._rate_limit_key(realm_id)]
+
+
+# ============================================
+# Pagination Tests
+# ============================================
+
+PAGE_SIZE = 10
+
+
+class FakeRealm:
+    """
+    Stands in for _qbo_query over a fixed set of Payment rows.
+
+    `count` is what COUNT(*) reports, which can lag the rows actually
+    there. Pages are answered in a shuffled order, so a test only passes
+    if results are put back in page order.
+    """
+
+    def __init__(self, rows: int, count: int = None, fail_at: int = None):
+        self.rows = [{"Id": str(i)} for i in range(rows)]
+        self.count = rows if count is None else count
+        self.fail_at = fail_at
+        self.queries = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.finished = []
+
+    async def __call__(self, client, access_token, realm_id, query):
+        self.queries.append(query)
+        if "COUNT(*)" in query:
+            return {"totalCount": self.count}
+
+        start = int(query.split("STARTPOSITION ")[1].split()[0])
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if start == self.fail_at:
+                raise QBOTokenExpired("QuickBooks token expired")
+            # Later pages answer sooner
+            await asyncio.sleep(0.001 * (100 - start % 100))
+        finally:
+            self.in_flight -= 1
+
+        self.finished.append(start)
+        return {"Payment": self.rows[start - 1:start - 1 + PAGE_SIZE]}
+
+
+async def paginate(monkeypatch, realm: FakeRealm) -> list[dict]:
+    monkeypatch.setattr(quickbooks, "_qbo_query", realm)
+    return await quickbooks._paginate_qbo_query(
+        "token", "realm", "Payment", "2025-01-01", max_results=PAGE_SIZE,
+    )
+
+
+class TestPaginateQboQuery:
+    """_paginate_qbo_query fetches pages concurrently and returns them in order."""
+
+    @pytest.mark.asyncio
+    async def test_short_first_page_skips_count(self, monkeypatch):
+        realm = FakeRealm(rows=4)
+
+        assert await paginate(monkeypatch, realm) == realm.rows
+        assert len(realm.queries) == 1
+
+    @pytest.mark.asyncio
+    async def test_keeps_page_order(self, monkeypatch):
+        realm = FakeRealm(rows=95)
+
+        assert await paginate(monkeypatch, realm) == realm.rows
+        assert realm.finished[1:] != sorted(realm.finished[1:])
+
+    @pytest.mark.asyncio
+    async def test_caps_pages_in_flight(self, monkeypatch):
+        monkeypatch.setattr(quickbooks, "QBO_PAGE_CONCURRENCY", 2)
+        realm = FakeRealm(rows=95)
+
+        assert await paginate(monkeypatch, realm) == realm.rows
+        assert realm.max_in_flight == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_page_raises_its_own_error(self, monkeypatch):
+        """The page's exception surfaces, not an ExceptionGroup, and the rest are cancelled."""
+        monkeypatch.setattr(quickbooks, "QBO_PAGE_CONCURRENCY", 2)
+        realm = FakeRealm(rows=95, fail_at=11)
+
+        with pytest.raises(QBOTokenExpired):
+            await paginate(monkeypatch, realm)
+
+        assert realm.in_flight == 0
+        assert len(realm.finished) < 9
+
+    @pytest.mark.parametrize("rows, count", [
+        (35, 20),   # rows added after the COUNT
+        (20, 20),   # last page exactly full
+    ])
+    @pytest.mark.asyncio
+    async def test_keeps_fetching_while_last_page_full(self, monkeypatch, rows, count):
+        realm = FakeRealm(rows=rows, count=count)
+
+        assert await paginate(monkeypatch, realm) == realm.rows
@@ -0,0 +1,101 @@
+# tests/test_ratelimit.py
+
+"""
+Tests for the client-side sliding-window rate limiter.
+"""
+
+import asyncio
+import time
+import uuid
+
+import pytest
+
+from app.core import ratelimit
+
+
+PERIOD = 0.2
+
+
+@pytest.fixture
+def key() -> str:
+    """A fresh limiter key, so tests never share a window or lock."""
+    return f"test:{uuid.uuid4()}"
+
+
+async def timed_acquire(key: str, limit: int) -> float:
+    """Acquire under key and return how long it took, in seconds."""
+    start = time.monotonic()
+    await ratelimit.acquire(key, limit, PERIOD)
+    return time.monotonic() - start
+
+
+# ============================================
+# acquire
+# ============================================
+
+class TestAcquire:
+    """acquire() admits `limit` calls per period and queues the rest."""
+
+    @pytest.mark.asyncio
+    async def test_admits_limit_immediately(self, key):
+        waits = [await timed_acquire(key, 3) for _ in range(3)]
+
+        assert max(waits) < PERIOD / 4
+
+    @pytest.mark.asyncio
+    async def test_call_over_limit_waits_one_period(self, key):
+        for _ in range(3):
+            await ratelimit.acquire(key, 3, PERIOD)
+
+        wait = await timed_acquire(key, 3)
+
+        assert PERIOD * 0.8 <= wait < PERIOD * 2
+
+    @pytest.mark.asyncio
+    async def test_concurrent_waiters_are_spread_over_periods(self, key):
+        """Of 2*limit concurrent callers, the second half waits a period."""
+        waits = await asyncio.gather(*(timed_acquire(key, 2) for _ in range(4)))
+
+        assert sorted(waits)[1] < PERIOD / 4
+        assert sorted(waits)[2] >= PERIOD * 0.8
+
+    @pytest.mark.asyncio
+    async def test_keys_are_independent(self, key):
+        for _ in range(2):
+            await ratelimit.acquire(key, 2, PERIOD)
+
+        assert await timed_acquire(f"{key}:other", 2) < PERIOD / 4
+
+
+# ============================================
+# retry_after
+# ============================================
+
+class TestRetryAfter:
+    """retry_after() reports how long until acquire() would not wait."""
+
+    def test_unknown_key(self, key):
+        assert ratelimit.retry_after(key, 3, PERIOD) == 0.0
+
+    @pytest.mark.asyncio
+    async def test_zero_below_limit(self, key):
+        for _ in range(2):
+            await ratelimit.acquire(key, 3, PERIOD)
+
+        assert ratelimit.retry_after(key, 3, PERIOD) == 0.0
+
+    @pytest.mark.asyncio
+    async def test_positive_at_limit(self, key):
+        for _ in range(3):
+            await ratelimit.acquire(key, 3, PERIOD)
+
+        assert 0.0 < ratelimit.retry_after(key, 3, PERIOD) <= PERIOD
+
+    @pytest.mark.asyncio
+    async def test_zero_once_window_passes(self, key):
+        for _ in range(3):
+            await ratelimit.acquire(key, 3, PERIOD)
+
+        await asyncio.sleep(PERIOD)
+
+        assert ratelimit.retry_after(key, 3, PERIOD) == 0.0
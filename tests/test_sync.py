@@ -0,0 +1,161 @@
+# tests/test_sync.py
+
+"""
+Tests for the sync routes: throttling and combined syncs.
+"""
+
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.dependencies import get_current_user
+from app.integrations import quickbooks
+from app.main import app
+from app.models import TransactionCreate
+from app.routers import sync
+
+
+QBO_CONNECTION = {"access_token": "qbo-token", "refresh_token": "qbo-refresh", "realm_id": "realm"}
+
+
+@pytest.fixture
+def client():
+    app.dependency_overrides[get_current_user] = lambda: "user-1"
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def saved(monkeypatch) -> list:
+    """Stub the database write, recording what each sync saves."""
+    batches = []
+
+    async def save_transactions(user_id, transactions):
+        batches.append(transactions)
+        return len(transactions)
+
+    monkeypatch.setattr(sync, "save_transactions", save_transactions)
+    return batches
+
+
+def payment(id: str) -> TransactionCreate:
+    return TransactionCreate(
+        external_id=id,
+        source="quickbooks",
+        transaction_type="payment",
+        amount=100.0,
+        transaction_date=date(2025, 1, 15),
+    )
+
+
+def throttle(retry_after):
+    """A fetch_transactions stub that fails with QBOThrottled."""
+    async def fetch_transactions(**kwargs):
+        raise quickbooks.QBOThrottled("QuickBooks rate limit exceeded", retry_after=retry_after)
+    return fetch_transactions
+
+
+# ============================================
+# QuickBooks Throttling Tests
+# ============================================
+
+class TestQuickbooksThrottled:
+    """A throttled QuickBooks sync is a 429 with retry hints, not a 500."""
+
+    @pytest.fixture(autouse=True)
+    def connected(self, monkeypatch):
+        async def get_connection(user_id, service):
+            return QBO_CONNECTION
+
+        monkeypatch.setattr(sync, "get_connection", get_connection)
+
+    @pytest.mark.parametrize("retry_after, expected", [
+        (12.2, "13"),   # rounded up to whole seconds
+        (0.0, "1"),     # never tells clients to retry immediately
+        (None, "1"),
+    ])
+    def test_429_headers(self, client, monkeypatch, retry_after, expected):
+        monkeypatch.setattr(quickbooks, "fetch_transactions", throttle(retry_after))
+
+        response = client.post("/sync/quickbooks", json={"days": 30})
+
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == expected
+        assert response.headers["RateLimit-Limit"] == str(quickbooks.QBO_REQUESTS_PER_MINUTE)
+        assert response.headers["RateLimit-Remaining"] == "0"
+
+    def test_success_has_no_rate_limit_headers(self, client, monkeypatch, saved):
+        async def fetch_transactions(**kwargs):
+            return [payment("1")]
+
+        monkeypatch.setattr(quickbooks, "fetch_transactions", fetch_transactions)
+
+        response = client.post("/sync/quickbooks", json={"days": 30})
+
+        assert response.status_code == 200
+        assert "Retry-After" not in response.headers
+
+
+# ============================================
+# Sync All Tests
+# ============================================
+
+class TestSyncAll:
+    """sync_all runs both syncs side by side and reports each outcome."""
+
+    @pytest.fixture
+    def connections(self, monkeypatch) -> dict:
+        """Stub the bulk connection lookup; tests fill in what exists."""
+        found = {}
+
+        async def get_connections_bulk(user_id, services):
+            return {service: found[service] for service in services if service in found}
+
+        monkeypatch.setattr(sync, "get_connections_bulk", get_connections_bulk)
+        return found
+
+    def test_neither_connected(self, client, connections):
+        response = client.post("/sync/all", json={"days": 30})
+
+        assert response.status_code == 200
+        assert response.json() == {
+            "user_id": "user-1",
+            "stripe": {"success": False, "error": sync.NOT_CONNECTED["stripe"]},
+            "quickbooks": {"success": False, "error": sync.NOT_CONNECTED["quickbooks"]},
+        }
+
+    def test_one_fails_other_succeeds(self, client, connections, saved, monkeypatch):
+        connections.update(stripe={"access_token": "sk"}, quickbooks=QBO_CONNECTION)
+
+        async def stripe_fetch(**kwargs):
+            raise RuntimeError("card network down")
+
+        async def qbo_fetch(**kwargs):
+            return [payment("1"), payment("2")]
+
+        monkeypatch.setattr(sync.stripe, "fetch_transactions", stripe_fetch)
+        monkeypatch.setattr(quickbooks, "fetch_transactions", qbo_fetch)
+
+        response = client.post("/sync/all", json={"days": 30})
+
+        assert response.status_code == 200
+        assert response.json() == {
+            "user_id": "user-1",
+            "stripe": {"success": False, "error": "Failed to sync Stripe: card network down"},
+            "quickbooks": {"success": True, "transactions": 2},
+        }
+
+    def test_only_connected_service_syncs(self, client, connections, saved, monkeypatch):
+        connections.update(quickbooks=QBO_CONNECTION)
+
+        async def qbo_fetch(**kwargs):
+            return [payment("1")]
+
+        monkeypatch.setattr(quickbooks, "fetch_transactions", qbo_fetch)
+
+        response = client.post("/sync/all", json={"days": 30})
+
+        assert response.json()["stripe"] == {"success": False, "error": sync.NOT_CONNECTED["stripe"]}
+        assert response.json()["quickbooks"] == {"success": True, "transactions": 1}
+        assert len(saved) == 1